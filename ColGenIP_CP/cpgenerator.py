@@ -1,6 +1,18 @@
 from ortools.sat.python import cp_model
+import numpy as np
 import time
 
+class SolutionCollector(cp_model.CpSolverSolutionCallback):
+    # Every solution met during the search, as (objective, values of variables)
+    def __init__(self, variables):
+        super().__init__()
+        self.variables = variables
+        self.solutions = []
+
+    def on_solution_callback(self):
+        self.solutions.append((self.ObjectiveValue(), tuple(self.Value(v) for v in self.variables)))
+
+
 class CPPatternGenerator:
     def __init__(self, n_teams: int, lower: int, upper: int, distances: list):
         self.N = n_teams
@@ -14,23 +26,31 @@ class CPPatternGenerator:
         self.distances = distances
         self.max_dist = max(distances[i][j] for i in self.teams for j in self.teams)
 
-        self.patt_hashes = {i: [] for i in self.teams}
+        # Patterns the solver must not return again, per team, forbidden as tuples of venue codes
+        self.excluded = {i: set() for i in self.teams}
 
+        # Branching rules per team: (slot, venue, forced), venue == home is a home game
+        self.rules = {i: [] for i in self.teams}
+
+        # Search workers per solve (0 = CP-SAT default) and time limit per solve in
+        # seconds (None = no limit), set by the master from its deadline
+        self.threads = 0
+        self.time_limit = None
         self.solver = cp_model.CpSolver()
 
+        # Improving patterns returned per call, collected by a solution callback, and
+        # slots in which any two of them differ; set by the master
+        self.columns = 1
+        self.min_distance = 1
+
     def set_vars(self, model, home):
         # Define the venue variables.
         self.opponent = {s: model.NewIntVar(0, 2 * self.N - 1, f'opponent_{s}') 
                          for s in self.slots}
 
-        self.pat_hash = model.NewIntVar(0, (self.N + 1) ** (self.S),
-                                        'pat_hash')
-        
-        self.hash_aux = {s: model.NewIntVar(0, 2 * self.N - 1, f'opponent_{s}') 
-                          for s in self.slots}
-        
-        self.aux_hash = {i: model.NewBoolVar(f'aux_has_{i}') 
-                            for i in range(len(self.patt_hashes[home]))}
+        # Venue code per slot: 0 at home, v + 1 away at v
+        self.venue_code = {s: model.NewIntVar(0, self.N, f'venue_code_{s}') 
+                           for s in self.slots}
 
         self.auxiliar = {(j, s): model.NewBoolVar(f'auxiliar_{j}_{s}')
                     for j in self.teams_duplicated for s in self.slots}
@@ -73,23 +93,25 @@ class CPPatternGenerator:
             model.Add(sum(self.is_home[s + j] for j in range(self.upper + 1)) >= self.lower)
             model.Add(sum(1 - self.is_home[s + j] for j in range(self.upper + 1)) >= self.lower)
 
+        # R6: Reglas de branching
+        for s, v, forced in self.rules[home]:
+            if v == home:
+                model.Add(self.is_home[s] == int(forced))
+            elif forced:
+                model.Add(self.opponent[s] == self.N + v)
+            else:
+                model.Add(self.opponent[s] != self.N + v)
 
-        # R6: Hash constraints
+        # R7: Patrones excluidos, codigos de sede; las tuplas prohibidas se agregan en solve_excluding
         for s in self.slots:
-            model.Add(self.hash_aux[s] == 0).OnlyEnforceIf(self.is_home[s])
-            model.Add(self.hash_aux[s] == self.opponent[s] - self.N + 1).OnlyEnforceIf(self.is_home[s].Not())
-
-        model.Add(self.pat_hash == sum(self.hash_aux[s] * (self.N + 1) ** s
-                                       for s in self.slots))
-
-        # for ph in self.patt_hashes[home]:
-        #     model.Add(self.pat_hash != ph)
-            
-        for i, h in enumerate(self.patt_hashes[home]):
-            model.Add(self.pat_hash <= h - 1).OnlyEnforceIf(self.aux_hash[i].Not())
-            model.Add(self.pat_hash >= (h + 1)).OnlyEnforceIf(self.aux_hash[i])
+            model.Add(self.venue_code[s] == 0).OnlyEnforceIf(self.is_home[s])
+            model.Add(self.venue_code[s] == self.opponent[s] - self.N + 1).OnlyEnforceIf(self.is_home[s].Not())
 
     def set_objective(self, home, model, pi):
+        # pi = [Asignacion_t..., R_t_s...] as an array, duals of R reshaped to (team, slot)
+        pi = np.asarray(pi, dtype=float)
+        pi_R = pi[self.N:].reshape(self.N, self.S)
+        away_duals = pi_R[home] + pi_R
 
         # Auxiliares para calculo de distancia
         for j1 in self.teams_duplicated:
@@ -108,23 +130,23 @@ class CPPatternGenerator:
                         # juego como casa en ambos partidos
                         if j1 <= self.N - 1 and j2 <= self.N - 1: 
                             model.Add(self.travel[s] == 0).OnlyEnforceIf(
-                                    self.auxiliar[j1, s]).OnlyEnforceIf(self.auxiliar[j2, s + 1])
+                                    [self.auxiliar[j1, s], self.auxiliar[j2, s + 1]])
                         # Debo ir de casa hacia j2
                         elif j1 <= self.N - 1 and j2 >= self.N:
                             model.Add(self.travel[s] == self.distances[home][j2 - self.N]).OnlyEnforceIf(
-                                    self.auxiliar[j1, s]).OnlyEnforceIf(self.auxiliar[j2, s + 1])
+                                    [self.auxiliar[j1, s], self.auxiliar[j2, s + 1]])
                         # Debo ir de j1 a casa
                         elif j1 >= self.N and j2 <= self.N - 1:
                             model.Add(self.travel[s] == self.distances[j1 - self.N][home]).OnlyEnforceIf(
-                                    self.auxiliar[j1, s]).OnlyEnforceIf(self.auxiliar[j2, s + 1])
+                                    [self.auxiliar[j1, s], self.auxiliar[j2, s + 1]])
                         # Debo ir de j1 a j2
                         elif j1 >= self.N and j2 >= self.N:
                             model.Add(self.travel[s] == self.distances[j1 - self.N][j2 - self.N]).OnlyEnforceIf(
-                                    self.auxiliar[j1, s]).OnlyEnforceIf(self.auxiliar[j2, s + 1])
+                                    [self.auxiliar[j1, s], self.auxiliar[j2, s + 1]])
 
         for s in self.slots:
             for t in self.teams_duplicated:
-                model.Add(self.pi_auxiliar[t, s] == 1).OnlyEnforceIf(self.is_home[s].Not()).OnlyEnforceIf(self.auxiliar[t, s])
+                model.Add(self.pi_auxiliar[t, s] == 1).OnlyEnforceIf([self.is_home[s].Not(), self.auxiliar[t, s]])
                 model.Add(self.pi_auxiliar[t, s] == 0).OnlyEnforceIf(self.is_home[s])
                 model.Add(self.pi_auxiliar[t, s] == 0).OnlyEnforceIf(self.auxiliar[t, s].Not())
 
@@ -133,10 +155,9 @@ class CPPatternGenerator:
         model.Minimize(
             self.total_travel 
             + self.init_travel + self.last_travel 
-            - sum((pi[self.N + home * len(self.slots) + s] 
-                   + pi[self.N + (t - self.N) * len(self.slots) + s]) * self.pi_auxiliar[t, s]
-                    for s in self.slots for t in self.teams_duplicated) 
-            - pi[home]
+            - sum(float(away_duals[t - self.N, s]) * self.pi_auxiliar[t, s]
+                    for s in self.slots for t in self.teams_duplicated if t >= self.N) 
+            - float(pi[home])
         )
     
     def initialize_model(self, home, pi):
@@ -146,6 +167,9 @@ class CPPatternGenerator:
         self.set_objective(home, model, pi)
         return model
 
+    def venue_codes(self, home, pattern):
+        return [0 if v == home else v + 1 for v in pattern]
+
     def convert_pattern(self, home, pattern):
         new_patt = []
         for t in pattern:
@@ -155,40 +179,79 @@ class CPPatternGenerator:
                 new_patt.append(t - self.N)
         return tuple(new_patt)
 
+    def set_params(self, start):
+        if self.threads:
+            self.solver.parameters.num_workers = self.threads
+        # The time limit covers the whole call, model building included
+        if self.time_limit is not None:
+            self.solver.parameters.max_time_in_seconds = max(0.0, self.time_limit - (time.time() - start))
+
+    def solve_excluding(self, model, home, start, accepted, collector=None):
+        # Excluded patterns are forbidden lazily, like the MIP no-goods: only a pattern the
+        # search actually returns is forbidden, then the model is solved again. The model
+        # grows with the exclusions hit in this call, not with the whole history. An optimal
+        # excluded pattern that does not price out is kept: nothing else can improve either
+        while True:
+            self.set_params(start)
+            status = self.solver.Solve(model, collector)
+            if status not in accepted:
+                return status, None
+
+            pat = tuple([self.solver.Value(self.opponent[s]) for s in self.slots])
+            pattern = self.convert_pattern(home, pat)
+            if pattern not in self.excluded[home]:
+                return status, pattern
+            if status == cp_model.OPTIMAL and model.HasObjective() and self.solver.ObjectiveValue() >= -1e-6:
+                return status, pattern
+            model.AddForbiddenAssignments([self.venue_code[s] for s in self.slots], [self.venue_codes(home, pattern)])
+
     def single_solve(self, home, pi):
         start = time.time()
         model = self.initialize_model(home, pi)
-        status = self.solver.Solve(model)
+        collector = SolutionCollector([self.opponent[s] for s in self.slots]) if self.columns > 1 else None
+        status, pattern = self.solve_excluding(model, home, start, (cp_model.OPTIMAL,), collector)
         end = time.time()
         ans = dict()
         if status == cp_model.OPTIMAL:
             ans['status'] = 'Feasible'
-            pat = tuple([self.solver.Value(self.opponent[s]) for s in self.slots])
-            ans['pattern'] = self.convert_pattern(home, pat)
+            ans['pattern'] = pattern
             ans['obj_val'] = self.solver.ObjectiveValue()
             ans['time'] = end - start
             if ans['obj_val'] < 0.5:
-                self.patt_hashes[home].append(self.solver.Value(self.pat_hash))
+                self.excluded[home].add(ans['pattern'])
+            if collector is not None:
+                found = [(value, self.convert_pattern(home, pat)) for value, pat in collector.solutions]
+                found = [(value, p) for value, p in found if p not in self.excluded[home]]
+                # Lazy: the CP scripts of this folder run without colgen on the path
+                from colgen.column_selection import diverse_columns
+                ans['patterns'] = diverse_columns([(ans['obj_val'], ans['pattern'])] + found,
+                                                  self.columns, self.min_distance)
 
         elif status == cp_model.INFEASIBLE:
             ans['status'] = 'Infeasible'
-            self.patt_hashes[home] = []
+            self.excluded[home] = set()
             print('EEO')
 
+        elif status in (cp_model.FEASIBLE, cp_model.UNKNOWN):
+            ans['status'] = 'Time Limit'
+
+        # Solver statistics for the convergence trace
+        ans['stats'] = {'branches': self.solver.NumBranches(), 'conflicts': self.solver.NumConflicts()}
+
         return ans
     
     def single_gen_solve(self, home):
+        start = time.time()
         model = cp_model.CpModel()
         self.set_vars(model, home)
         self.set_constrs(home, model)
-        status = self.solver.Solve(model)
+        status, pattern = self.solve_excluding(model, home, start, (cp_model.OPTIMAL, cp_model.FEASIBLE))
         ans = dict()
-        if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
+        if pattern is not None:
             ans['status'] = 'Feasible'
-            pat = tuple([self.solver.Value(self.opponent[s]) for s in self.slots])
-            ans['pattern'] = self.convert_pattern(home, pat)
+            ans['pattern'] = pattern
 
-            self.patt_hashes[home].append(self.solver.Value(self.pat_hash))
+            self.excluded[home].add(ans['pattern'])
         else:
             ans['status'] = 'Infeasible'
         return ans
@@ -216,7 +279,7 @@ if __name__ == '__main__':
         print(ans)
         # print("yahoooo")
 
-    print(sorted(generator.patt_hashes[home]))
+    print(len(generator.excluded[home]), 'excluded')
     end = time.time()
 
     print(end - start)
@@ -0,0 +1,265 @@
+import numpy as np
+import time
+
+class DPPatternGenerator:
+    # Label-setting dynamic program over the slots. A label is (visited away venues,
+    # current location, home/away flags of the last U slots); labels sharing a state
+    # are dominated by the cheapest one, so each state keeps a single cost. Labels whose
+    # cost minus the most the remaining slots can still gain from the duals exceeds the
+    # value of the team's last patterns at the current duals are pruned. Excluded patterns
+    # are followed explicitly along a prefix tree and only the labels that leave it enter
+    # the states, so the answer is the best pattern that is not excluded.
+    # Memory: one byte per state and slot for the predecessors, 2^(N-1) * N * 2^U * (2N - 2)
+    # bytes (126 MB at N = 16, U = 3), plus two float cost layers of 2^(N-1) * N * 2^U
+    def __init__(self, n_teams: int, lower: int, upper: int, distances: list):
+        self.N = n_teams
+        self.S = 2 * n_teams - 2
+        self.teams = range(n_teams)
+        self.slots = range(self.S)
+
+        self.lower = lower
+        self.upper = upper
+        self.D = np.asarray(distances, dtype=float)
+
+        # Home/away history kept in the state, only needed when some window fits in the season
+        self.windows = self.upper + 1 <= self.S
+        self.H = 2 ** self.upper if self.windows else 1
+
+        # Away venues visited as a bitmask over the other N - 1 teams
+        self.M = 2 ** (self.N - 1)
+        self.popcount = np.array([bin(m).count('1') for m in range(self.M)])
+
+        # Branching rules per team: (slot, venue, forced), venue == home is a home game
+        self.rules = {i: [] for i in self.teams}
+
+        # Same interface as the other sattelites, the DP itself is single threaded and
+        # bounded by the size of its state space
+        self.threads = 0
+        self.time_limit = None
+
+        # Improving patterns returned per call and slots in which any two of them differ,
+        # set by the master; the extra ones come from the other final states of the DP
+        self.columns = 1
+        self.min_distance = 1
+
+        # Patterns already known to the master (as in the other sattelites), and the two
+        # cheapest patterns of the last call per team, which bound the next one
+        self.excluded = {i: set() for i in self.teams}
+        self.last_patterns = {i: [] for i in self.teams}
+        self.pred_dtype = np.uint8 if self.N * self.H <= 256 else np.uint16
+
+    def window_ok(self, s, history, home_game):
+        # Window [s - U, s]: between L and U home games and between L and U away games
+        if not self.windows or s < self.upper:
+            return True
+        homes = bin(history).count('1') + home_game
+        aways = self.upper + 1 - homes
+        return self.lower <= homes <= self.upper and self.lower <= aways <= self.upper
+
+    def allowed(self, home, s):
+        # Venues team home may play at in slot s under its branching rules
+        venues = set(self.teams)
+        for slot, v, forced in self.rules[home]:
+            if slot != s:
+                continue
+            if forced:
+                venues &= {v}
+            else:
+                venues.discard(v)
+        return venues
+
+    def upper_bound(self, home, pi_R):
+        # Travel minus away duals of the last patterns that are still allowed and not excluded
+        bound = np.inf
+        for pattern in self.last_patterns[home]:
+            if pattern in self.excluded[home] or any((pattern[s] == v) != forced for s, v, forced in self.rules[home]):
+                continue
+            stops = [home] + list(pattern) + [home]
+            travel = sum(self.D[a, b] for a, b in zip(stops[:-1], stops[1:]))
+            bound = min(bound, travel - sum(pi_R[home, s] + pi_R[v, s] for s, v in enumerate(pattern) if v != home))
+        return bound
+
+    def leave_prefixes(self, home, s, trie, prefixes, venues, away_duals, bit, new):
+        # Moves the labels of the excluded prefixes one slot: a move that stays on an excluded
+        # prefix is kept in the tree, any other one competes for its state in new. Returns
+        # the next tree and, per state entered, the prefix its label comes from
+        nxt = dict()
+        left = dict()
+        for prefix, (mask, loc, h, value) in trie.items():
+            for u in venues:
+                home_game = int(u == home)
+                if home_game and s - self.popcount[mask] >= self.N - 1:
+                    continue
+                if not home_game and mask & bit[u]:
+                    continue
+                if not self.window_ok(s, h, home_game):
+                    continue
+
+                state = (mask if home_game else mask | bit[u], u, ((h << 1) | home_game) & (self.H - 1))
+                cand = value + self.D[loc, u] - (0 if home_game else away_duals[u])
+                child = prefix + (u,)
+                if child in prefixes:
+                    nxt[child] = state + (cand,)
+                elif cand < new[state]:
+                    new[state] = cand
+                    left[state] = child
+        return nxt, left
+
+    def label_setting(self, home, pi, count=1, start=None):
+        # (reduced cost, pattern) of the count cheapest final states, cheapest first;
+        # None when time_limit runs out first
+        pi = np.asarray(pi, dtype=float)
+        pi_R = pi[self.N:].reshape(self.N, self.S)
+
+        # Bound: a single pattern must beat the last ones, several must still price out
+        bound = self.upper_bound(home, pi_R)
+        if self.columns > 1:
+            bound = max(bound, float(pi[home]))
+
+        # Most the slots after s can still subtract (travel is nonnegative)
+        others = [j for j in self.teams if j != home]
+        gains = np.maximum(0, (pi_R[home][None, :] + pi_R[others]).max(axis=0))
+        remaining = np.concatenate([np.cumsum(gains[::-1])[::-1][1:], [0.0]])
+
+        bit = {j: 1 << k for k, j in enumerate(others)}
+        masks = np.arange(self.M)
+        # Masks that have not visited j yet, per away venue j
+        sources = {j: np.flatnonzero((masks & bit[j]) == 0) for j in others}
+        rows = np.arange(self.M)
+
+        cost = np.full((self.M, self.N, self.H), np.inf)
+        prefixes = {p[:k] for p in self.excluded[home] for k in range(self.S + 1)}
+        trie = {(): (0, home, 0, 0.0)} if prefixes else dict()
+        if not prefixes:
+            cost[0, home, 0] = 0
+        preds = []
+        diverted = []
+
+        for s in self.slots:
+            if self.time_limit is not None and start is not None and time.time() - start > self.time_limit:
+                return None
+
+            new = np.full((self.M, self.N, self.H), np.inf)
+            pred = np.zeros((self.M, self.N, self.H), dtype=self.pred_dtype)
+            venues = self.allowed(home, s)
+            away_duals = pi_R[home, s] + pi_R[:, s]
+            # Home games played so far, at most N - 1 in total
+            homes_full = (s - self.popcount) >= self.N - 1
+
+            for h in range(self.H):
+                current = cost[:, :, h]
+                if not np.isfinite(current).any():
+                    continue
+
+                for home_game in (1, 0):
+                    if not self.window_ok(s, h, home_game):
+                        continue
+                    nh = ((h << 1) | home_game) & (self.H - 1)
+
+                    if home_game:
+                        if home not in venues:
+                            continue
+                        cand = current + self.D[:, home]
+                        loc = cand.argmin(axis=1)
+                        val = cand[rows, loc]
+                        val[homes_full] = np.inf
+                        better = val < new[:, home, nh]
+                        new[better, home, nh] = val[better]
+                        pred[better, home, nh] = loc[better] * self.H + h
+                        continue
+
+                    for v in others:
+                        if v not in venues:
+                            continue
+                        src = sources[v]
+                        cand = current[src] + self.D[:, v]
+                        loc = cand.argmin(axis=1)
+                        val = cand[np.arange(len(src)), loc] - away_duals[v]
+                        dst = src | bit[v]
+                        better = val < new[dst, v, nh]
+                        new[dst[better], v, nh] = val[better]
+                        pred[dst[better], v, nh] = loc[better] * self.H + h
+
+            trie, left = self.leave_prefixes(home, s, trie, prefixes, venues, away_duals, bit, new)
+            new[new - remaining[s] > bound + 1e-9] = np.inf
+            cost = new
+            preds.append(pred)
+            diverted.append(left)
+
+        # Every venue visited, back home at the end
+        final = cost[self.M - 1] + self.D[:, home][:, None]
+        order = np.argsort(final, axis=None, kind='stable')[:count]
+        order = order[np.isfinite(final.ravel()[order])]
+
+        labels = []
+        for state in order.tolist():
+            loc, h = np.unravel_index(state, final.shape)
+            value = float(final[loc, h]) - float(pi[home])
+
+            suffix = []
+            prefix = ()
+            mask, loc, h = self.M - 1, int(loc), int(h)
+            for s in reversed(self.slots):
+                if (mask, loc, h) in diverted[s]:
+                    # Left an excluded prefix here
+                    prefix = diverted[s][mask, loc, h]
+                    break
+                p = preds[s][mask, loc, h]
+                suffix.append(loc)
+                if loc != home:
+                    mask ^= bit[loc]
+                loc, h = divmod(int(p), self.H)
+            labels.append((value, prefix + tuple(reversed(suffix))))
+
+        return labels
+
+    def single_solve(self, home, pi):
+        start = time.time()
+        labels = self.label_setting(home, pi, 2 if self.columns <= 1 else self.N * self.H, start)
+        end = time.time()
+        ans = dict()
+        if labels is None:
+            ans['status'] = 'Time Limit'
+            return ans
+        if not labels:
+            ans['status'] = 'Infeasible'
+            self.excluded[home] = set()
+            return ans
+
+        value, pattern = labels[0]
+        self.last_patterns[home] = [p for _, p in labels[:2]]
+        ans['status'] = 'Feasible'
+        ans['pattern'] = pattern
+        ans['obj_val'] = value
+        ans['time'] = end - start
+        if value < 0.5:
+            self.excluded[home].add(pattern)
+        if self.columns > 1:
+            # Lazy, as in the other sattelites
+            from colgen.column_selection import diverse_columns
+            ans['patterns'] = diverse_columns(labels, self.columns, self.min_distance)
+        return ans
+
+    def single_gen_solve(self, home):
+        # Cheapest pattern by travel alone, not returned again
+        ans = self.single_solve(home, np.zeros(self.N + self.N * self.S))
+        ans.pop('obj_val', None)
+        ans.pop('time', None)
+        if ans['status'] == 'Feasible':
+            self.excluded[home].add(ans['pattern'])
+        return ans
+
+
+if __name__ == '__main__':
+    from inst_gen.generator import generate_distance_matrix
+
+
+    n = 4
+    distances = generate_distance_matrix(n)
+    rng = np.random.default_rng(0)
+
+    generator = DPPatternGenerator(n, 1, 3, distances)
+
+    for home in range(n):
+        pi = rng.uniform(-50, 150, n + n * (2 * n - 2))
+        print(generator.single_solve(home, pi))
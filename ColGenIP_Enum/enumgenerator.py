@@ -0,0 +1,151 @@
+from math import factorial
+from itertools import permutations
+import numpy as np
+import time
+
+from colgen.pattern_costs import pattern_costs
+from colgen.initial_schedule import window_violations
+from colgen.column_selection import diverse_columns
+
+class EnumPatternGenerator:
+    # All feasible patterns of a team, enumerated once: home/away sequences that meet
+    # the L/U windows times the orders of the N - 1 away venues. Pricing is one sparse
+    # matrix-vector product of the (pattern, R row) incidence with the duals
+    def __init__(self, n_teams: int, lower: int, upper: int, distances: list, max_patterns=2_000_000):
+        self.N = n_teams
+        self.S = 2 * n_teams - 2
+        self.teams = range(n_teams)
+        self.slots = range(self.S)
+
+        self.lower = lower
+        self.upper = upper
+        self.D = np.asarray(distances)
+        self.max_patterns = max_patterns
+
+        # Same home/away sequences for every team; too many patterns fails here, not mid-solve
+        if factorial(self.N - 1) > self.max_patterns:
+            raise ValueError(f'{factorial(self.N - 1)} venue orders per team exceed max_patterns={self.max_patterns}')
+        self.sequences = self.home_sequences()
+        self.count = len(self.sequences) * factorial(self.N - 1)
+        if self.count > self.max_patterns:
+            raise ValueError(f'{self.count} patterns per team exceed max_patterns={self.max_patterns}')
+
+        # Per team, built on first use
+        self.patterns = dict()
+        self.costs = dict()
+        self.incidence = dict()
+
+        # Branching rules per team: (slot, venue, forced), venue == home is a home game
+        self.rules = {i: [] for i in self.teams}
+
+        # Patterns already known to the master, as in the other sattelites; matched through
+        # their base-N codes
+        self.excluded = {i: set() for i in self.teams}
+        self.codes = dict()
+        self.powers = self.N ** np.arange(self.S, dtype=np.int64)
+
+        # Same interface as the other sattelites
+        self.threads = 0
+        self.time_limit = None
+
+        # Improving patterns returned per call and slots in which any two of them differ
+        self.columns = 1
+        self.min_distance = 1
+
+    def home_sequences(self):
+        # Home flags of every sequence with N - 1 away games meeting the L/U windows
+        codes = np.arange(2 ** self.S)
+        home = ((codes[:, None] >> np.arange(self.S)) & 1).astype(bool)
+        home = home[home.sum(axis=1) == self.N - 1]
+        return home[window_violations(home, self.lower, self.upper) == 0]
+
+    def enumerate(self, home):
+        others = [j for j in self.teams if j != home]
+        orders = np.array(list(permutations(others)), dtype=np.int8).reshape(-1, self.N - 1)
+        P = np.full((self.count, self.S), home, dtype=np.int8)
+        for k, seq in enumerate(self.sequences):
+            block = P[k * len(orders):(k + 1) * len(orders)]
+            block[:, np.flatnonzero(~seq)] = orders
+
+        # Nonzeros of each column in the R rows: (home, s) and (venue, s) per away slot
+        rows, slots = np.nonzero(P != home)
+        venues = P[rows, slots].astype(np.intp)
+        rows = np.repeat(rows, 2)
+        cols = np.stack([home * self.S + slots, venues * self.S + slots], axis=1).ravel()
+
+        self.patterns[home] = P
+        self.codes[home] = P.astype(np.int64) @ self.powers
+        self.costs[home] = pattern_costs(self.D, P, home)
+        self.incidence[home] = (rows, cols)
+
+    def reduced_costs(self, home, pi):
+        if home not in self.patterns:
+            self.enumerate(home)
+
+        pi = np.asarray(pi, dtype=float)
+        rows, cols = self.incidence[home]
+        slot_duals = np.bincount(rows, weights=pi[self.N:][cols], minlength=len(self.patterns[home]))
+        return self.costs[home] - pi[home] - slot_duals
+
+    def allowed(self, home):
+        P = self.patterns[home]
+        mask = np.ones(len(P), dtype=bool)
+        for s, v, forced in self.rules[home]:
+            mask &= (P[:, s] == v) if forced else (P[:, s] != v)
+        if self.excluded[home]:
+            excluded = np.array(list(self.excluded[home]), dtype=np.int64) @ self.powers
+            mask &= ~np.isin(self.codes[home], excluded)
+        return mask
+
+    def single_solve(self, home, pi):
+        start = time.time()
+        rc = self.reduced_costs(home, pi)
+        rc[~self.allowed(home)] = np.inf
+        end = time.time()
+        ans = dict()
+        if not np.isfinite(rc).any():
+            ans['status'] = 'Infeasible'
+            self.excluded[home] = set()
+            return ans
+
+        best = int(np.argmin(rc))
+        ans['status'] = 'Feasible'
+        ans['pattern'] = tuple(int(v) for v in self.patterns[home][best])
+        ans['obj_val'] = float(rc[best])
+        ans['time'] = end - start
+        if ans['obj_val'] < 0.5:
+            self.excluded[home].add(ans['pattern'])
+        if self.columns > 1:
+            # Cheapest candidates, enough to fill k after the diversity filter
+            m = min(self.columns * self.N, len(rc))
+            ids = np.argpartition(rc, m - 1)[:m]
+            ans['patterns'] = diverse_columns([(float(rc[i]), tuple(int(v) for v in self.patterns[home][i]))
+                                               for i in ids], self.columns, self.min_distance)
+        return ans
+
+    def single_gen_solve(self, home):
+        # Cheapest pattern by travel alone, not returned again
+        ans = self.single_solve(home, np.zeros(self.N + self.N * self.S))
+        ans.pop('obj_val', None)
+        ans.pop('time', None)
+        if ans['status'] == 'Feasible':
+            self.excluded[home].add(ans['pattern'])
+        return ans
+
+
+if __name__ == '__main__':
+    from inst_gen.generator import generate_distance_matrix
+    from ColGenIP_IP.MIP_col_gen import MIPPatternGenerator
+
+    # Exact reference for the other sattelites
+    n = 4
+    distances = generate_distance_matrix(n)
+    rng = np.random.default_rng(0)
+
+    generator = EnumPatternGenerator(n, 1, 3, distances)
+    reference = MIPPatternGenerator(n, 1, 3, distances)
+
+    for home in range(n):
+        pi = rng.uniform(-50, 150, n + n * (2 * n - 2))
+        print(generator.single_solve(home, pi), len(generator.patterns[home]), 'patterns')
+        print(reference.single_solve(home, pi))
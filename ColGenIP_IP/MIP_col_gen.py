@@ -1,5 +1,6 @@
 from gurobipy import GRB, Model, Column
 from gurobipy import quicksum 
+import numpy as np
 import time
 
 class MIPPatternGenerator:
@@ -11,26 +12,30 @@ class MIPPatternGenerator:
         self.lower = lower
         self.upper = upper
         self.D = distances
-        self.LINEAR = False
 
-        self.bases = []
-        self.hashes_dict = {i: [] for i in self.teams}
-        self.M = self.N ** self.S
+        # Solver threads per model (0 = Gurobi default), optional private environment and
+        # time limit per solve in seconds (None = no limit), set by the master from its deadline
+        self.threads = 0
+        self.env = None
+        self.time_limit = None
+
+        # Branching rules per team: (slot, venue, forced), venue == home is a home game
+        self.rules = {i: [] for i in self.teams}
+
+        # Patterns the solver must not return again, per team. Enforced by lazy no-good
+        # cuts on the away variables, so the model size does not grow with the history
+        self.excluded = {i: set() for i in self.teams}
+
+        # Improving patterns returned per call, read from the solution pool, and slots in
+        # which any two of them differ; set by the master
+        self.columns = 1
+        self.min_distance = 1
 
     def initialize_variables(self, model, home):
         self.home_play = model.addVars(self.teams, self.slots, vtype=GRB.BINARY, name='home')
         self.away_play = model.addVars(self.teams, self.slots, vtype=GRB.BINARY, name='away')
         self.y = model.addVars(self.teams, self.teams, self.slots, vtype=GRB.BINARY, name='y')
-        self.hash = model.addVar(vtype=GRB.INTEGER, name='hash')
 
-        # aux_hash[i] = 1 <-> hash > self.hashes_dict[home] 
-        self.aux_hash = {}
-        for i, h in enumerate(self.hashes_dict[home]):
-            self.aux_hash[i] = model.addVar(lb=0, ub=1,vtype=GRB.INTEGER, name=f'aux_hash_{h}')
-
-        if self.hashes_dict[home]:
-            self.M = max(self.hashes_dict[home]) + 1
-        
     def initialize_constraints(self, model, home):
         # R1 ningun equipo juega contrasigo mismo
         model.addConstrs(
@@ -96,91 +101,131 @@ class MIPPatternGenerator:
             for i in self.teams for j in self.teams for s in range(2 * self.N - 3)
         )
 
-        # Hashes
-        model.addConstr(
-            self.hash == quicksum(self.away_play[j, s] * (j + 1) * (self.N + 1) ** s for j in self.teams for s in self.slots)
-        )
-        for i, h in enumerate(self.hashes_dict[home]):
-            if self.LINEAR:
-                model.addConstr(self.hash <= h - 1 + self.M * self.aux_hash[i])
-                model.addConstr(self.hash >= (h + 1) - self.M * (1 - self.aux_hash[i]))
+        # Branching rules
+        for s, v, forced in self.rules[home]:
+            if v == home:
+                venue = quicksum(self.home_play[j, s] for j in self.teams)
             else:
-                model.addConstr(self.hash * (1 - self.aux_hash[i]) -1e-12 <= h - 1)
-                model.addConstr(self.hash >= (h + 1) * self.aux_hash[i] -1e-12)
-            
+                venue = self.away_play[v, s]
+            model.addConstr(venue == int(forced))
+
         model.update()
 
     def initialize_objective(self, model, home, pi):
+        # pi = [Asignacion_t..., R_t_s...] as an array, duals of R reshaped to (team, slot)
+        pi = np.asarray(pi, dtype=float)
+        pi_R = pi[self.N:].reshape(self.N, self.S)
+        away_duals = pi_R[home] + pi_R
 
         model.setObjective(
             quicksum([self.D[i][j] * self.y[i, j, s] for i in self.teams for j in self.teams for s in self.slots]) 
             + quicksum([self.D[home][j] * self.away_play[j, self.slots[0]] for j in self.teams])  
             + quicksum([self.D[j][home] * self.away_play[j, self.slots[-1]] for j in self.teams])
-            - quicksum((pi[self.N + home * len(self.slots) + s] 
-                + pi[self.N + t * len(self.slots) + s]) * (self.away_play[t, s])
-                for s in self.slots for t in self.teams
+            - quicksum(float(away_duals[t, s]) * self.away_play[t, s]
+                for s in self.slots for t in self.teams if t != home
             ) 
-            - pi[home]
+            - float(pi[home])
             , GRB.MINIMIZE
         )
 
         model.update()
 
-    def single_solve(self, home, pi):
-        model = Model()
+    def new_model(self):
+        model = Model(env=self.env)
         model.setParam('OutputFlag', 0)
+        if self.threads:
+            model.setParam('Threads', self.threads)
+        model._start = time.time()
+        return model
+
+    def read_pattern(self, home, away):
+        # away: values of away_play; one game per slot, so no away game means home
+        return tuple(next((j for j in self.teams if away[j, s] > 0.5), home) for s in self.slots)
+
+    def no_good(self, home, pattern):
+        # At most N - 2 of the N - 1 away games of pattern
+        return quicksum(self.away_play[v, s] for s, v in enumerate(pattern) if v != home) <= self.N - 2
+
+    def exclusion_callback(self, home):
+        # Rejects incumbents already in the exclusion list with a lazy no-good cut
+        def callback(model, where):
+            if where != GRB.Callback.MIPSOL:
+                return
+            pattern = self.read_pattern(home, model.cbGetSolution(self.away_play))
+            if pattern in self.excluded[home]:
+                model.cbLazy(self.no_good(home, pattern))
+
+        return callback
+
+    def optimize(self, model, home):
+        # The time limit covers the whole call, model building included
+        if self.time_limit is not None:
+            model.setParam('TimeLimit', max(0.0, self.time_limit - (time.time() - model._start)))
+        if self.columns > 1:
+            model.setParam('PoolSolutions', max(10, 4 * self.columns))
+
+        if not self.excluded[home]:
+            model.optimize()
+            return
+
+        model.setParam('LazyConstraints', 1)
+        model.optimize(self.exclusion_callback(home))
+
+    def pool_patterns(self, model, home):
+        # (objective, pattern) of every solution Gurobi kept on the way
+        for i in range(model.SolCount):
+            model.setParam('SolutionNumber', i)
+            pattern = self.read_pattern(home, model.getAttr('Xn', self.away_play))
+            if pattern not in self.excluded[home]:
+                yield model.PoolObjVal, pattern
+
+    def single_solve(self, home, pi):
+        model = self.new_model()
         start = time.time()
         self.initialize_variables(model, home)
         self.initialize_constraints(model, home)
         self.initialize_objective(model, home, pi)
-        model.optimize()
+        self.optimize(model, home)
         end = time.time()
         ans = dict()
         if model.status == GRB.OPTIMAL:
             ans['status'] = 'Feasible'
-            HAPattern = []
-            for s in self.slots:
-                for j in self.teams:
-                    if self.away_play[j, s].X > 0.5:
-                        HAPattern.append(j)
-                    elif self.home_play[j, s].X > 0.5:
-                        HAPattern.append(home)
-
-            ans['pattern'] = tuple(HAPattern)
+            ans['pattern'] = self.read_pattern(home, model.getAttr('X', self.away_play))
             ans['obj_val'] = model.ObjVal
             ans['time'] = end - start
 
             if ans['obj_val'] < 0.5:
-                self.hashes_dict[home].append(int(self.hash.X + 1e-12))
+                self.excluded[home].add(ans['pattern'])
+            if self.columns > 1:
+                # Only needed with several columns, ttpsolver_IPIP.py runs without colgen
+                from colgen.column_selection import diverse_columns
+                ans['patterns'] = diverse_columns([(ans['obj_val'], ans['pattern'])] + list(self.pool_patterns(model, home)),
+                                                  self.columns, self.min_distance)
             
         elif model.status == GRB.INFEASIBLE:
             ans['status'] = 'Infeasible'
-            self.hashes_dict[home] = []
+            self.excluded[home] = set()
             print('EEO')
 
+        elif model.status == GRB.TIME_LIMIT:
+            ans['status'] = 'Time Limit'
+
+        # Solver statistics for the convergence trace
+        ans['stats'] = {'nodes': model.NodeCount, 'simplex_iters': model.IterCount}
+
         return ans
     
     def single_gen_solve(self, home):
-        model = Model()
-        model.setParam('OutputFlag', 0)
+        model = self.new_model()
         self.initialize_variables(model, home)
         self.initialize_constraints(model, home)
 
-        model.optimize()
+        self.optimize(model, home)
         ans = dict()
         if model.status == GRB.OPTIMAL or model.status == GRB.SUBOPTIMAL or (model.status == GRB.TIME_LIMIT and model.solCount > 0):
             ans['status'] = 'Feasible'
-            HAPattern = []
-            
-            for s in self.slots:
-                for j in self.teams:
-                    if self.away_play[j, s].X > 0.5:
-                        HAPattern.append(j)
-                    elif self.home_play[j, s].X > 0.5:
-                        HAPattern.append(home)
-
-            ans['pattern'] = tuple(HAPattern)
-            self.hashes_dict[home].append(int(self.hash.X + 1e-12))
+            ans['pattern'] = self.read_pattern(home, model.getAttr('X', self.away_play))
+            self.excluded[home].add(ans['pattern'])
             
         else:
             ans['status'] = 'Infeasible'
@@ -207,8 +252,12 @@ if __name__ == '__main__':
     start = time.time()
     for _ in range(iters):
         ans = generator.single_gen_solve(home)
-        print(generator.hashes_dict[home][-1])
         print(ans)
+        if ans['status'] == 'Infeasible':
+            break
+        patterns.add(ans['pattern'])
+
+    print(len(patterns), 'distinct patterns', len(generator.excluded[home]), 'excluded')
 
     end = time.time()
     
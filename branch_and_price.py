@@ -0,0 +1,276 @@
+from gurobipy import Env
+import numpy as np
+import heapq
+from time import time
+from threading import Thread, Condition
+from ttp_master import TTPMaster
+from colgen.deadline import Deadline
+
+
+class TTPBranchAndPrice:
+    # Branch-and-price over TTPMaster: column generation at every node, branching on
+    # team-slot-venue (team t plays slot s at venue v or not), best-bound node selection.
+    # Nodes only change column bounds, so each node LP is warm-started from the last basis
+    def __init__(self, n_teams: int, distances: list, lower: int, upper: int, satt1=None, satt2=None,
+                 verbose=False, workers=1, gap_tolerance=None, root_heuristic=True, heuristic_time=0.1,
+                 **master_args):
+        self.N = n_teams
+        self.S = 2 * n_teams - 2
+        self.args = (n_teams, distances, lower, upper, satt1, satt2)
+        self.master_args = master_args
+        self.VERBOSE = verbose
+
+        self.workers = workers
+        self.gap_tolerance = gap_tolerance
+        self.root_heuristic = root_heuristic
+        # Share of the time left that the root integer program may use
+        self.heuristic_time = heuristic_time
+        self.deadline = None
+
+        self.root = TTPMaster(*self.args, verbose=verbose, **master_args)
+        self.masters = [self.root]
+        self.integral_costs = self.root.integral_costs
+
+        # Open nodes as (parent bound, node id, rules); running maps node id -> bound
+        self.nodes = []
+        self.running = dict()
+        self.node_count = 0
+        self.explored = 0
+        self.pruned = 0
+        self.lock = Condition()
+
+        self.incumbent = {'objective': float('inf'), 'patterns': []}
+        self.update_incumbent(self.root.best_sol['objective'], self.root.best_sol['patterns'])
+        self.root_bound = None
+        self.start_time = None
+        self.elapsed_time = None
+        self.stopped = False
+        self.gap_stop = False
+        # Gurobi status of a node master that ended neither solved nor stopped on time
+        self.master_status = None
+
+    def push(self, bound, rules):
+        heapq.heappush(self.nodes, (bound, self.node_count, rules))
+        self.node_count += 1
+
+    def prunable(self, bound):
+        if self.integral_costs:
+            bound = np.ceil(bound - 1e-6)
+        return bound >= self.incumbent['objective'] - 1e-6
+
+    def update_incumbent(self, objective, patterns):
+        with self.lock:
+            if patterns and objective < self.incumbent['objective'] - 1e-9:
+                self.incumbent = {'objective': float(objective), 'patterns': list(patterns)}
+                if self.VERBOSE:
+                    print(f'New incumbent: {objective}')
+
+    def best_bound(self):
+        bounds = [bound for bound, _, _ in self.nodes] + list(self.running.values())
+        return min(bounds + [self.incumbent['objective']])
+
+    def gap_closed(self):
+        if self.gap_tolerance is None or self.incumbent['objective'] == float('inf'):
+            return False
+        inc = self.incumbent['objective']
+        return (inc - self.best_bound()) / max(1.0, abs(inc)) <= self.gap_tolerance
+
+    def tree_closed(self):
+        # No node running and every open one prunable: the incumbent is proven optimal
+        return not self.running and all(self.prunable(bound) for bound, _, _ in self.nodes)
+
+    def branching_candidate(self, master, values):
+        # flow[t, s, v]: LP weight of team t playing slot s at venue v; the most
+        # fractional one is branched on. All flows integral means x is integral
+        ids = np.flatnonzero(values > 1e-9)
+        P = master.store.rows()[ids].astype(np.intp)
+        owners = master.store.owners()[ids].astype(np.intp)
+
+        flow = np.zeros((self.N, self.S, self.N))
+        for s in range(self.S):
+            np.add.at(flow, (owners, s, P[:, s]), values[ids])
+
+        frac = np.abs(flow - 0.5)
+        frac[(flow < 1e-6) | (flow > 1 - 1e-6)] = np.inf
+        if not np.isfinite(frac).any():
+            return None
+        return tuple(int(i) for i in np.unravel_index(np.argmin(frac), frac.shape))
+
+    def process_node(self, master, bound, rules):
+        master.start_node(rules, self.incumbent['objective'])
+        master.column_generation()
+        self.update_incumbent(master.best_sol['objective'], master.best_sol['patterns'])
+
+        if master.master_status is not None:
+            # The node LP cannot be trusted (and its primals may be another node's): the
+            # node stays open and the search ends with that status
+            with self.lock:
+                self.master_status = master.master_status
+                self.stopped = True
+                self.lock.notify_all()
+            return [(bound, rules)]
+
+        if master.stopped:
+            # Interrupted (stop() or out of time), the node stays open and the search ends
+            with self.lock:
+                self.stopped = True
+                self.lock.notify_all()
+            return [(bound, rules)]
+
+        node_bound = master.lp_bound
+        if not rules:
+            self.root_bound = node_bound
+        if master.infeasible or master.gap_stop or self.prunable(node_bound):
+            with self.lock:
+                self.pruned += 1
+            return []
+
+        branch = self.branching_candidate(master, master.primals)
+        if branch is None:
+            return []
+
+        t, s, v = branch
+        if self.VERBOSE:
+            print(f'Node bound {node_bound}: branching on team {t}, slot {s}, venue {v}')
+        return [(node_bound, rules + [(t, s, v, True)]), (node_bound, rules + [(t, s, v, False)])]
+
+    def search(self, master, max_nodes=None):
+        processed = 0
+        while max_nodes is None or processed < max_nodes:
+            with self.lock:
+                while not self.nodes and self.running and not self.stopped:
+                    self.lock.wait()
+                if self.stopped or not self.nodes:
+                    self.lock.notify_all()
+                    return
+
+                bound, node, rules = heapq.heappop(self.nodes)
+                if self.prunable(bound):
+                    self.pruned += 1
+                    continue
+                self.running[node] = bound
+
+            children = self.process_node(master, bound, rules)
+            processed += 1
+
+            with self.lock:
+                del self.running[node]
+                self.explored += 1
+                for child_bound, child_rules in children:
+                    self.push(child_bound, child_rules)
+                # A closed tree is not a gap stop, the remaining nodes are pruned as they are popped
+                if self.gap_closed() and not self.tree_closed():
+                    self.gap_stop = True
+                    self.stopped = True
+                self.lock.notify_all()
+
+    def clone_master(self):
+        # Worker masters start from the root columns, with their own sattelites and Gurobi environment
+        patterns = self.root.store.patterns(self.root.store.active_rows())
+        # Only the root master uses the checkpoint and the column cache
+        master_args = dict(self.master_args, deadline=self.deadline, checkpoint=None, column_cache=None)
+        return TTPMaster(*self.args, patterns=patterns, env=Env(params={'OutputFlag': 0}), **master_args)
+
+    def solve_alg(self):
+        self.start_time = time()
+        self.push(-np.inf, [])
+        self.search(self.root, max_nodes=1)
+
+        if self.root_heuristic and not self.stopped and self.nodes:
+            # Integer program over the root columns as a first incumbent
+            patterns, objective = self.root.integer_solver(timeout=self.deadline.remaining() * self.heuristic_time)
+            if patterns:
+                self.update_incumbent(objective, patterns)
+
+        if self.workers <= 1:
+            self.search(self.root)
+            return
+
+        self.masters += [self.clone_master() for _ in range(self.workers - 1)]
+        threads = [Thread(target=self.search, args=(master,), daemon=True) for master in self.masters]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def stop(self):
+        with self.lock:
+            self.stopped = True
+            self.lock.notify_all()
+        for master in self.masters:
+            master.stop()
+
+    def solve(self, timeout=3600):
+        # One deadline for the whole search, every node master prices within it
+        self.deadline = Deadline(timeout, {'search': 1.0})
+        self.root.deadline = self.deadline
+
+        solve_thread = Thread(target=self.solve_alg, daemon=True)
+        solve_thread.start()
+
+        solve_thread.join(timeout=self.deadline.start_phase('search'))
+        tiempo_terminado = False
+        if solve_thread.is_alive() or (self.stopped and not self.gap_stop and self.master_status is None):
+            print('\nTIMEOUT')
+            tiempo_terminado = True
+            self.stop()
+            # Pricing calls in flight end at the deadline too, give them a moment to return
+            solve_thread.join(timeout=1.0)
+        for master in self.masters:
+            master.close_pricing()
+            master.close_heuristics()
+
+        self.elapsed_time = self.deadline.elapsed()
+
+        with self.lock:
+            if self.incumbent['objective'] < self.root.best_sol['objective']:
+                self.root.best_sol = dict(self.incumbent)
+            self.root.save_checkpoint(force=True)
+            self.root.cache_columns()
+            # Trace of the root master, every node it priced; the worker masters keep their own
+            self.root.write_trace()
+
+            lower_bound = self.best_bound()
+            found = self.incumbent['objective'] < float('inf')
+
+            ans = dict()
+            ans['pattern'] = self.incumbent['patterns'] if found else None
+            ans['best fractionary solution'] = self.root_bound
+            ans['best integer solution'] = self.incumbent['objective'] if found else None
+            if tiempo_terminado:
+                ans['status'] = 'Time Limit'
+            elif self.master_status is not None:
+                ans['status'] = f'Master Status {self.master_status}'
+            elif found and self.tree_closed():
+                ans['status'] = 'Optimal'
+            elif self.gap_stop:
+                ans['status'] = 'Gap Limit'
+            elif self.nodes or self.running:
+                # Search ended early (e.g. a solver error), the tree is not closed
+                ans['status'] = 'Feasible' if found else 'Unknown'
+            elif found:
+                ans['status'] = 'Optimal'
+            else:
+                ans['status'] = 'Infeasible'
+            ans['time'] = self.elapsed_time
+            ans['lower bound'] = float(lower_bound) if found or self.nodes or self.running else None
+            ans['nodes'] = self.explored
+            ans['pruned'] = self.pruned
+
+        if self.VERBOSE:
+            print(f'\nElapsed time: {self.elapsed_time}')
+            print(f"Nodes: {self.explored} explored, {self.pruned} pruned, {len(self.nodes)} open")
+            print(f"Incumbent: {ans['best integer solution']}, lower bound: {ans['lower bound']}")
+
+        return ans
+
+
+if __name__ == '__main__':
+    from ColGenIP_CP.inst_gen.generator import generate_distance_matrix
+    from ColGenIP_IP.MIP_col_gen import MIPPatternGenerator
+
+    n = 4
+    dist = generate_distance_matrix(n)
+
+    bp_solver = TTPBranchAndPrice(n, dist, 1, 3, satt1=MIPPatternGenerator, verbose=True)
+    print(bp_solver.solve(timeout=60))
@@ -0,0 +1,80 @@
+import hashlib
+import os
+import tempfile
+import numpy as np
+from time import time
+from colgen.pattern_store import PatternStore
+
+
+def instance_key(n_teams, lower, upper, distances):
+    # Content hash of an instance: same N, L, U and distance matrix give the same key.
+    # Whole-valued matrices hash as int64 whatever their dtype (the keys of the existing
+    # checkpoints), any other matrix by its own dtype and bytes
+    digest = hashlib.sha1(f'{n_teams};{lower};{upper};'.encode())
+    distances = np.ascontiguousarray(distances)
+    if distances.dtype.kind in 'iub' or np.array_equal(distances, np.round(distances)):
+        digest.update(np.ascontiguousarray(distances, dtype=np.int64).tobytes())
+    else:
+        digest.update(distances.dtype.str.encode())
+        digest.update(distances.tobytes())
+    return digest.hexdigest()
+
+
+def atomic_savez(path, **arrays):
+    # Written next to path and renamed over it, readers never see a partial file
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile(dir=directory, suffix='.tmp', delete=False) as file:
+        np.savez_compressed(file, **arrays)
+    # Temporary files are private, the result is shared with the other processes
+    os.chmod(file.name, 0o644)
+    os.replace(file.name, path)
+
+
+class Checkpoint:
+    # Columns, root lower bound and incumbent of one instance in a compact .npz, saved every
+    # `every` seconds during column generation; a new run of the instance resumes from it
+    def __init__(self, directory, n_teams, lower, upper, distances, seed=None, every=300):
+        self.key = instance_key(n_teams, lower, upper, distances)
+        self.N = n_teams
+        self.distances = distances
+        self.every = every
+        self.last_save = time()
+
+        name = f'N_{n_teams}_L_{lower}_U_{upper}' + (f'_seed_{seed}' if seed is not None else '')
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f'{name}_{self.key[:16]}.npz')
+
+        # Best root bound seen, node bounds of a branch-and-price search are not kept
+        self.lower_bound = -np.inf
+
+    def due(self):
+        return time() - self.last_save >= self.every
+
+    def save(self, store, lower_bound, incumbent):
+        # lower_bound: root Lagrangian bound (None inside a branch-and-price node)
+        if lower_bound is not None:
+            self.lower_bound = max(self.lower_bound, lower_bound)
+
+        patterns = np.array(incumbent['patterns'], dtype=np.int8).reshape(-1, 2 * self.N - 2)
+        atomic_savez(self.path, key=self.key, lower_bound=self.lower_bound,
+                     incumbent_objective=incumbent['objective'], incumbent=patterns, **store.arrays())
+        self.last_save = time()
+
+    def load(self):
+        # Store, root lower bound and incumbent of the last save, None without a usable file
+        if not os.path.exists(self.path):
+            return None
+
+        try:
+            data = np.load(self.path)
+            if str(data['key']) != self.key:
+                return None
+            store = PatternStore.from_arrays(data, self.distances)
+        except (OSError, ValueError, KeyError):
+            print(f'Checkpoint {self.path} could not be read, starting from scratch')
+            return None
+
+        self.lower_bound = float(data['lower_bound'])
+        incumbent = {'objective': float(data['incumbent_objective']),
+                     'patterns': [tuple(int(v) for v in p) for p in data['incumbent']]}
+        return store, self.lower_bound, incumbent
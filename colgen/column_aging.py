@@ -0,0 +1,51 @@
+import numpy as np
+
+
+class ColumnAging:
+    def __init__(self, max_columns: int, max_age=10, min_rc=1e-6, keep_ratio=0.75):
+        # Purge once the master holds more than max_columns columns, removing columns
+        # nonbasic for at least max_age rounds with reduced cost above min_rc,
+        # down to keep_ratio * max_columns. Hysteresis: a column purged k times before must be
+        # nonbasic for max_age * 2^k rounds, so purge and reprice cannot alternate quickly while
+        # every column stays purgeable and the master bounded
+        self.max_columns = max_columns
+        self.max_age = max_age
+        self.min_rc = min_rc
+        self.keep_ratio = keep_ratio
+
+        self.age = np.zeros(0, dtype=np.int32)
+        self.rc = np.zeros(0)
+        self.purges = np.zeros(0, dtype=np.int32)
+        self.purged = 0
+
+    def grow(self, size):
+        if size > len(self.age):
+            extra = max(size, 2 * len(self.age)) - len(self.age)
+            self.age = np.concatenate([self.age, np.zeros(extra, dtype=np.int32)])
+            self.rc = np.concatenate([self.rc, np.zeros(extra)])
+            self.purges = np.concatenate([self.purges, np.zeros(extra, dtype=np.int32)])
+
+    def update(self, ids, basic, reduced_costs):
+        if len(ids) == 0:
+            return
+
+        self.grow(int(ids.max()) + 1)
+        self.age[ids] = np.where(basic, 0, self.age[ids] + 1)
+        self.rc[ids] = reduced_costs
+
+    def select(self, ids):
+        if len(ids) <= self.max_columns:
+            return ids[:0]
+
+        required = self.max_age * 2 ** np.minimum(self.purges[ids], 20)
+        stale = ids[(self.age[ids] >= required) & (self.rc[ids] > self.min_rc)]
+        excess = len(ids) - int(self.keep_ratio * self.max_columns)
+
+        # Highest reduced cost first, older first on ties
+        order = np.lexsort((-self.age[stale], -self.rc[stale]))
+        selected = stale[order][:excess]
+        self.age[selected] = 0
+        self.purges[selected] += 1
+        self.purged += len(selected)
+
+        return selected
@@ -0,0 +1,76 @@
+import fcntl
+import os
+import numpy as np
+from contextlib import contextmanager
+from colgen.checkpoint import instance_key, atomic_savez
+from colgen.pattern_store import PatternStore
+
+
+class ColumnCache:
+    # Columns shared across runs and processes: one .npz per instance, named by the hash of
+    # (N, L, U, distances), whatever sattelite generated them. Entries are merged on write
+    # under an exclusive lock on the directory and replaced atomically; reads refresh the
+    # entry's mtime and the least recently used entries go once the cache exceeds max_bytes
+    def __init__(self, directory, max_bytes=512 * 2 ** 20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, f'{key}.npz')
+
+    @contextmanager
+    def locked(self):
+        with open(os.path.join(self.directory, '.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def read(self, key, distances):
+        try:
+            return PatternStore.from_arrays(np.load(self.path(key)), distances)
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def get(self, n_teams, lower, upper, distances):
+        # Cached (team, pattern) pairs of the instance, [] on a miss
+        key = instance_key(n_teams, lower, upper, distances)
+        store = self.read(key, distances)
+        if store is None:
+            return []
+
+        try:
+            os.utime(self.path(key))
+        except OSError:
+            pass
+        return list(zip(store.owners().tolist(), store.patterns(range(len(store)))))
+
+    def put(self, n_teams, lower, upper, distances, store):
+        # Adds every pattern of store to the instance entry
+        key = instance_key(n_teams, lower, upper, distances)
+        with self.locked():
+            merged = self.read(key, distances) or PatternStore(n_teams, distances, capacity=len(store))
+            for row in range(len(store)):
+                merged.add(int(store.owner[row]), store.matrix[row], float(store.cost[row]), PatternStore.POOL)
+
+            atomic_savez(self.path(key), **merged.arrays())
+            self.evict(keep=key)
+
+    def evict(self, keep=None):
+        # Least recently used entries first, never the one just written
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.npz'):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if name == f'{keep}.npz':
+                continue
+            os.remove(os.path.join(self.directory, name))
+            total -= size
@@ -0,0 +1,77 @@
+import numpy as np
+from colgen.pattern_costs import reduced_costs
+from colgen.pattern_store import PatternStore
+
+
+class ColumnPool:
+    # Known patterns outside the master: the POOL rows of the shared pattern store
+    def __init__(self, store: PatternStore):
+        self.store = store
+        self.N = store.N
+        self.S = store.S
+        self.teams = range(store.N)
+
+        # Pool rows per team, rebuilt lazily when the store version of the team changes
+        self.cached = {t: (-1, None) for t in self.teams}
+
+    def __len__(self):
+        return len(self.store.rows_in(PatternStore.POOL))
+
+    def __contains__(self, pattern):
+        row = self.store.row_of(pattern)
+        return row is not None and self.store.state[row] == PatternStore.POOL
+
+    def add(self, team, pattern):
+        row = self.store.row_of(pattern)
+        if row is None:
+            self.store.add(team, pattern, state=PatternStore.POOL)
+            return True
+
+        if self.store.state[row] != PatternStore.DROPPED:
+            return False
+
+        self.store.set_state(row, PatternStore.POOL)
+        return True
+
+    def rows(self, team):
+        version, rows = self.cached[team]
+        if version != self.store.version[team]:
+            rows = self.store.rows_in(PatternStore.POOL, team)
+            self.cached[team] = (self.store.version[team], rows)
+        return rows
+
+    def matrix(self, team):
+        return self.store.matrix[self.rows(team)]
+
+    def remove(self, team, positions):
+        rows = self.rows(team)[np.asarray(positions, dtype=np.intp)]
+        self.store.set_state(rows, PatternStore.DROPPED)
+
+    def discard(self, team, pattern):
+        if pattern in self:
+            self.store.set_state(self.store.row_of(pattern), PatternStore.DROPPED)
+
+    def team_reduced_costs(self, team, duals, allowed=None):
+        # allowed: optional filter (pattern matrix -> boolean mask), filtered patterns read as +inf
+        rows = self.rows(team)
+        rc = reduced_costs(duals, self.store.matrix[rows], team, self.store.cost[rows])
+        if allowed is not None:
+            rc[~allowed(self.store.matrix[rows])] = np.inf
+        return rc
+
+    def min_reduced_cost(self, team, duals, allowed=None):
+        if len(self.rows(team)) == 0:
+            return np.inf
+        return float(self.team_reduced_costs(team, duals, allowed).min())
+
+    def price(self, team, duals, limit=1, tol=1e-6, allowed=None):
+        # Takes out of the pool the (at most limit) patterns with negative reduced cost
+        if len(self.rows(team)) == 0:
+            return []
+
+        rc = self.team_reduced_costs(team, duals, allowed)
+        best = [int(i) for i in np.argsort(rc)[:limit] if rc[i] < -tol]
+        patterns = self.store.patterns(self.rows(team)[best])
+        self.remove(team, best)
+
+        return patterns
@@ -0,0 +1,21 @@
+import numpy as np
+
+
+def diverse_columns(candidates, k, min_distance=1, tolerance=1e-6):
+    # candidates: (reduced cost, pattern) pairs in any order, duplicates allowed. Returns up to
+    # k patterns with negative reduced cost, cheapest first, each differing from the ones
+    # already picked in at least min_distance slots
+    picked = []
+    seen = set()
+    for rc, pattern in sorted(candidates, key=lambda candidate: candidate[0]):
+        if len(picked) == k or rc >= -tolerance:
+            break
+        if pattern in seen:
+            continue
+        seen.add(pattern)
+
+        row = np.asarray(pattern)
+        if all(np.count_nonzero(row != np.asarray(other)) >= min_distance for other in picked):
+            picked.append(pattern)
+
+    return picked
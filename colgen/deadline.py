@@ -0,0 +1,50 @@
+from time import time
+
+
+class Deadline:
+    # Wall-clock budget of a whole run. Phases run one after the other; each one gets
+    # its fraction of the time still left over the fractions of the phases not yet run,
+    # so whatever an early phase does not use goes to the later ones
+    PHASES = {'colgen': 0.8, 'integer': 0.2}
+
+    def __init__(self, budget, fractions=None):
+        self.budget = float(budget)
+        self.start = time()
+        self.end = self.start + self.budget
+        self.fractions = dict(fractions) if fractions else dict(self.PHASES)
+
+        self.phase = None
+        self.phase_end = self.end
+
+    def check(self, *names):
+        # A deadline handed to a solver must know the phases it runs
+        missing = [name for name in names if name not in self.fractions]
+        if missing:
+            raise ValueError(f'Deadline has no phase {", ".join(missing)}, its phases are {list(self.fractions)}')
+
+    def elapsed(self):
+        return time() - self.start
+
+    def remaining(self):
+        return max(0.0, self.end - time())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def start_phase(self, name):
+        # Seconds granted to phase name, counted from now
+        names = list(self.fractions)
+        later = sum(self.fractions[p] for p in names[names.index(name):])
+        seconds = self.remaining() * (self.fractions[name] / later if later > 0 else 1.0)
+
+        self.phase = name
+        self.phase_end = time() + seconds
+        return seconds
+
+    def phase_remaining(self):
+        return max(0.0, min(self.phase_end, self.end) - time())
+
+    def limit(self, cap=None):
+        # Time limit for one solver call inside the current phase
+        seconds = self.phase_remaining()
+        return seconds if cap is None else min(seconds, cap)
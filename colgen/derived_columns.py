@@ -0,0 +1,75 @@
+import numpy as np
+from colgen.pattern_costs import as_pattern_matrix
+from colgen.initial_schedule import window_violations
+
+
+def reversals(P, teams):
+    # The season played backwards: same venues, same travel cost with symmetric distances
+    return P[:, ::-1], teams
+
+
+def trip_reversals(P, teams):
+    # Every road trip (maximal run of away games) visited in the opposite order,
+    # the home/away sequence does not change
+    out = P.copy()
+    for k in range(len(P)):
+        away = np.flatnonzero(P[k] != teams[k])
+        if len(away) == 0:
+            continue
+        breaks = np.flatnonzero(np.diff(away) > 1) + 1
+        for trip in np.split(away, breaks):
+            out[k, trip] = P[k, trip[::-1]]
+    return out, teams
+
+
+def venue_swaps(P, teams):
+    # The away game at slot a moved to home slot h (the game against that opponent
+    # changes venue, the home game takes its place): one pattern per (a, h) pair
+    rows, owners = [], []
+    for k in range(len(P)):
+        away = np.flatnonzero(P[k] != teams[k])
+        home = np.flatnonzero(P[k] == teams[k])
+        if len(away) == 0 or len(home) == 0:
+            continue
+        a, h = (grid.ravel() for grid in np.meshgrid(away, home, indexing='ij'))
+        swapped = np.repeat(P[k][None, :], len(a), axis=0)
+        swapped[np.arange(len(a)), h] = P[k, a]
+        swapped[np.arange(len(a)), a] = teams[k]
+        rows.append(swapped)
+        owners.append(np.full(len(a), teams[k]))
+
+    if not rows:
+        return P[:0], teams[:0]
+    return np.concatenate(rows), np.concatenate(owners)
+
+
+TRANSFORMS = {
+    'reverse': reversals,
+    'trips': trip_reversals,
+    'swap': venue_swaps,
+}
+
+
+def derive_patterns(patterns, teams, lower, upper, transforms=('reverse',)):
+    # Distinct feasible patterns obtained from the given ones, the originals excluded
+    P, teams = as_pattern_matrix(patterns, teams)
+    teams = np.asarray(teams)
+    derived = [TRANSFORMS[name](P, teams) for name in transforms]
+    if not derived:
+        return P[:0], teams[:0]
+
+    D = np.concatenate([matrix for matrix, _ in derived])
+    owners = np.concatenate([owner for _, owner in derived])
+    # Same consecutive games rule as the sattelites
+    keep = window_violations(D == owners[:, None], lower, upper) == 0
+    D, owners = D[keep], owners[keep]
+
+    # Unique (owner, pattern) pairs not among the inputs
+    keyed = np.concatenate([owners[:, None], D], axis=1)
+    _, first = np.unique(keyed, axis=0, return_index=True)
+    first = np.sort(first)
+    D, owners, keyed = D[first], owners[first], keyed[first]
+
+    sources = {row.tobytes() for row in np.concatenate([teams[:, None], P], axis=1)}
+    new = np.array([row.tobytes() not in sources for row in keyed], dtype=bool)
+    return D[new], owners[new]
@@ -0,0 +1,115 @@
+import numpy as np
+
+
+def circle_rounds(n_teams):
+    # Canonical 1-factorization (circle method): team N-1 stays, the others rotate.
+    # Pairs are (home, away) with the usual alternating orientation
+    rounds = []
+    m = n_teams - 1
+    for r in range(m):
+        games = [(n_teams - 1, r) if r % 2 == 0 else (r, n_teams - 1)]
+        for k in range(1, n_teams // 2):
+            i, j = (r + k) % m, (r - k) % m
+            games.append((i, j) if k % 2 == 1 else (j, i))
+        rounds.append(games)
+    return rounds
+
+
+def window_violations(home, lower, upper):
+    # home: (N, S) bool; every window of U + 1 slots needs between L and U home
+    # games and between L and U away games (same rule as the sattelites)
+    width = upper + 1
+    if home.shape[1] < width:
+        return np.zeros(len(home), dtype=int)
+
+    csum = np.concatenate([np.zeros((len(home), 1), dtype=int), np.cumsum(home, axis=1)], axis=1)
+    homes = csum[:, width:] - csum[:, :-width]
+    aways = width - homes
+    bad = (homes < lower) | (homes > upper) | (aways < lower) | (aways > upper)
+    return bad.sum(axis=1)
+
+
+def mirrored_schedule(n_teams, order, orientation):
+    # Slot s < N-1 plays round order[s] with the given orientation, slot s + N - 1 the same
+    # round with home and away swapped. Returns opponents and home flags, both (N, S)
+    rounds = circle_rounds(n_teams)
+    S = 2 * n_teams - 2
+    opponent = np.zeros((n_teams, S), dtype=int)
+    home = np.zeros((n_teams, S), dtype=bool)
+
+    for s, r in enumerate(order):
+        for i, j in rounds[r]:
+            if not orientation[min(i, j), max(i, j)]:
+                i, j = j, i
+            for slot, h, a in ((s, i, j), (s + n_teams - 1, j, i)):
+                opponent[h, slot], opponent[a, slot] = a, h
+                home[h, slot] = True
+
+    return opponent, home
+
+
+def schedule_patterns(opponent, home):
+    # Venue per slot: the team itself at home, the opponent when away
+    teams = np.arange(len(opponent))[:, None]
+    return [tuple(int(v) for v in row) for row in np.where(home, teams, opponent)]
+
+
+def double_round_robin(n_teams, lower, upper, rng, max_steps=200):
+    # Mirrored circle-method timetable whose home/away assignment is repaired with
+    # min-conflicts flips of a pair's orientation until every team meets L/U
+    order = list(range(n_teams - 1))
+    rng.shuffle(order)
+
+    orientation = dict()
+    for games in circle_rounds(n_teams):
+        for i, j in games:
+            orientation[min(i, j), max(i, j)] = i < j
+
+    opponent, home = mirrored_schedule(n_teams, order, orientation)
+    # A flip swaps home and away of both meetings of the pair, only rows i and j change
+    meetings = {pair: np.flatnonzero(opponent[pair[0]] == pair[1]) for pair in orientation}
+    violations = window_violations(home, lower, upper)
+
+    for _ in range(max_steps):
+        if violations.sum() == 0:
+            return schedule_patterns(opponent, home)
+
+        # Try every flip involving a violating team, keep the best (random ties)
+        t = int(rng.choice(np.flatnonzero(violations)))
+        best, candidates = None, []
+        for j in range(n_teams):
+            if j == t:
+                continue
+            pair = (min(t, j), max(t, j))
+            rows = list(pair)
+            flipped = home[rows]
+            flipped[:, meetings[pair]] ^= True
+            delta = window_violations(flipped, lower, upper).sum() - violations[rows].sum()
+            if best is None or delta < best:
+                best, candidates = delta, [pair]
+            elif delta == best:
+                candidates.append(pair)
+
+        pair = candidates[rng.integers(len(candidates))]
+        rows = list(pair)
+        home[np.ix_(rows, meetings[pair])] ^= True
+        violations[rows] = window_violations(home[rows], lower, upper)
+
+    return None
+
+
+def initial_schedules(n_teams, lower, upper, n_schedules=1, seed=0, max_restarts=10):
+    # Up to n_schedules distinct timetables, each a list with the pattern of team t at t;
+    # gives up after max_restarts failed repairs in a row
+    rng = np.random.default_rng(seed)
+    schedules = []
+    failures = 0
+    while len(schedules) < n_schedules and failures < max_restarts:
+        schedule = double_round_robin(n_teams, lower, upper, rng)
+        if schedule is None or schedule in schedules:
+            failures += 1
+        else:
+            schedules.append(schedule)
+            failures = 0
+
+    return schedules
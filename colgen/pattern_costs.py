@@ -0,0 +1,38 @@
+import numpy as np
+
+
+def as_pattern_matrix(patterns, teams):
+    P = np.asarray(patterns, dtype=np.intp)
+    if P.ndim == 1:
+        P = P[None, :]
+
+    teams = np.broadcast_to(np.asarray(teams, dtype=np.intp), P.shape[:1])
+    return P, teams
+
+
+def pattern_costs(distances, patterns, teams):
+    # distances: (N, N) array, patterns: (k, S) venues, teams: owner of each row
+    D = np.asarray(distances)
+    P, teams = as_pattern_matrix(patterns, teams)
+
+    return (D[teams, P[:, 0]]
+            + D[P[:, :-1], P[:, 1:]].sum(axis=1)
+            + D[P[:, -1], teams])
+
+
+def reduced_costs(duals, patterns, teams, costs):
+    # duals = [Asignacion_t..., R_t_s...]; only the 1 + 2 * (N - 1) nonzeros of
+    # each column are gathered from the dual vector
+    P, teams = as_pattern_matrix(patterns, teams)
+    k, S = P.shape
+    N = len(duals) // (S + 1)
+
+    pi = np.asarray(duals, dtype=float)
+    pi_A = pi[:N]
+    pi_R = pi[N:].reshape(N, S)
+
+    slots = np.arange(S)
+    away = P != teams[:, None]
+    slot_duals = pi_R[teams[:, None], slots] + pi_R[P, slots]
+
+    return np.asarray(costs, dtype=float) - pi_A[teams] - np.where(away, slot_duals, 0).sum(axis=1)
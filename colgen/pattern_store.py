@@ -0,0 +1,170 @@
+import numpy as np
+from colgen.pattern_costs import pattern_costs
+
+
+class PatternStore:
+    # Every pattern known to the solver, one int8 row each, shared by the master
+    # (column id = row), the pool and the integer phase
+    DROPPED, MASTER, POOL = 0, 1, 2
+
+    def __init__(self, n_teams: int, distances=None, capacity=64):
+        self.N = n_teams
+        self.S = 2 * n_teams - 2
+        self.teams = range(n_teams)
+        self.slots = range(self.S)
+        self.D = None if distances is None else np.asarray(distances)
+        capacity = 1 << max(6, int(capacity - 1).bit_length())
+
+        # Row i holds the pattern, owner[i] its team, cost[i] its travel cost and
+        # state[i] where it currently lives
+        self.matrix = np.zeros((capacity, self.S), dtype=np.int8)
+        self.owner = np.zeros(capacity, dtype=np.int8)
+        self.cost = np.zeros(capacity)
+        self.state = np.zeros(capacity, dtype=np.int8)
+        self.size = 0
+
+        # Open-addressing hash table over the packed rows (power of two size), -1 marks a free slot
+        self.table = np.full(2 * capacity, -1, dtype=np.int32)
+
+        # Bumped per team on every change, lets readers cache per-team row sets
+        self.version = np.zeros(n_teams, dtype=np.int64)
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, pattern):
+        return self.row_of(pattern) is not None
+
+    def key(self, pattern):
+        return np.asarray(pattern, dtype=np.int8).tobytes()
+
+    def probe(self, key):
+        # Slot of key in the table and its row (None when absent)
+        mask = len(self.table) - 1
+        h = hash(key) & mask
+        while True:
+            row = self.table[h]
+            if row < 0:
+                return h, None
+            if self.matrix[row].tobytes() == key:
+                return h, int(row)
+            h = (h + 1) & mask
+
+    def row_of(self, pattern):
+        return self.probe(self.key(pattern))[1]
+
+    def team_of(self, pattern):
+        counts = np.bincount(np.asarray(pattern), minlength=self.N)
+        owners = np.flatnonzero(counts == self.N - 1)
+        for t in owners:
+            if all(counts[j] == 1 for j in self.teams if j != t):
+                return int(t)
+
+        return None
+
+    def grow(self):
+        capacity = 2 * len(self.matrix)
+        for name in ('matrix', 'owner', 'cost', 'state'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+        # Rehash, load factor stays at most 1/2
+        self.table = np.full(2 * capacity, -1, dtype=np.int32)
+        for row in range(self.size):
+            h, _ = self.probe(self.matrix[row].tobytes())
+            self.table[h] = row
+
+    def add(self, team, pattern, cost=None, state=MASTER):
+        # Returns the row of pattern, adding it if new (an existing row keeps its state)
+        key = self.key(pattern)
+        h, row = self.probe(key)
+        if row is not None:
+            return row
+
+        if self.size == len(self.matrix):
+            self.grow()
+            h, _ = self.probe(key)
+
+        if cost is None:
+            cost = float(pattern_costs(self.D, pattern, team)[0])
+
+        p = self.size
+        self.matrix[p] = pattern
+        self.owner[p] = team
+        self.cost[p] = cost
+        self.state[p] = state
+        self.table[h] = p
+        self.size += 1
+        self.version[team] += 1
+
+        return p
+
+    def set_state(self, rows, state):
+        rows = np.atleast_1d(np.asarray(rows, dtype=np.intp))
+        self.state[rows] = state
+        for t in np.unique(self.owner[rows]):
+            self.version[t] += 1
+
+    def rows_in(self, state, team=None):
+        mask = self.state[:self.size] == state
+        if team is not None:
+            mask &= self.owner[:self.size] == team
+        return np.flatnonzero(mask)
+
+    def postings(self, rows):
+        # Rows per team, and per (team, slot) the rows playing at home / away there;
+        # built on demand instead of stored with every pattern
+        rows = np.asarray(rows, dtype=np.intp)
+        team_rows = {t: [] for t in self.teams}
+        home_t_s = {(t, s): [] for t in self.teams for s in self.slots}
+        away_t_s = {(t, s): [] for t in self.teams for s in self.slots}
+
+        owners = self.owner[rows]
+        for i, t in zip(rows.tolist(), owners.tolist()):
+            team_rows[t].append(i)
+
+        r, slots = np.nonzero(self.matrix[rows] != owners[:, None])
+        venues = self.matrix[rows[r], slots]
+        for i, s, v, t in zip(rows[r].tolist(), slots.tolist(), venues.tolist(), owners[r].tolist()):
+            home_t_s[v, s].append(i)
+            away_t_s[t, s].append(i)
+
+        return team_rows, home_t_s, away_t_s
+
+    def active_rows(self):
+        return self.rows_in(self.MASTER)
+
+    def pattern(self, row):
+        return tuple(int(v) for v in self.matrix[row])
+
+    def patterns(self, rows):
+        return [tuple(p) for p in self.matrix[np.asarray(rows, dtype=np.intp)].tolist()]
+
+    def rows(self):
+        return self.matrix[:self.size]
+
+    def owners(self):
+        return self.owner[:self.size]
+
+    def costs(self):
+        return self.cost[:self.size]
+
+    def arrays(self):
+        return {'n_teams': self.N, 'matrix': self.rows(), 'owner': self.owners(),
+                'cost': self.costs(), 'state': self.state[:self.size]}
+
+    @classmethod
+    def from_arrays(cls, data, distances=None):
+        store = cls(int(data['n_teams']), distances, capacity=max(64, len(data['matrix'])))
+        for pattern, team, cost, state in zip(data['matrix'], data['owner'], data['cost'], data['state']):
+            store.add(int(team), pattern, float(cost), int(state))
+        return store
+
+    def save(self, path):
+        np.savez_compressed(path, **self.arrays())
+
+    @classmethod
+    def load(cls, path, distances=None):
+        return cls.from_arrays(np.load(path), distances)
@@ -0,0 +1,94 @@
+import numpy as np
+
+
+class PricingScheduler:
+    # Teams are priced least recently priced first (most negative last reduced cost among
+    # equals). Partial rounds stop after max_columns improving columns and stay partial while
+    # the last full round still had max_columns improving teams. A team whose last answer was
+    # a nonnegative margin is skipped while a bound on its reduced-cost change since then
+    # stays below that margin
+    def __init__(self, n_teams: int, max_columns: int, skip_unchanged=True):
+        self.N = n_teams
+        self.S = 2 * n_teams - 2
+        self.teams = range(n_teams)
+        self.max_columns = max_columns
+        self.skip_unchanged = skip_unchanged
+
+        # Last reduced cost returned per team and answers received since; the first round
+        # of a node prices every team
+        self.last_rc = np.zeros(n_teams)
+        self.age = np.zeros(n_teams, dtype=int)
+        self.partial = False
+
+        # Nonnegative margin of the last answer (best pattern the sattelite does not exclude,
+        # i.e. not in the master or the pool) and the duals it was measured at
+        self.margin = np.full(n_teams, -np.inf)
+        self.margin_duals = {t: None for t in self.teams}
+
+        # Teams left unpriced (stopped early or skipped), teams skipped, partial rounds
+        self.skipped = 0
+        self.unchanged = 0
+        self.partial_rounds = 0
+
+    def reset(self):
+        # New node: other branching rules, the margins no longer hold
+        self.partial = False
+        self.margin[:] = -np.inf
+        self.margin_duals = {t: None for t in self.teams}
+
+    def snapshot(self):
+        # State and counters, for work that must leave no trace (diving)
+        return {'last_rc': self.last_rc.copy(), 'age': self.age.copy(), 'partial': self.partial,
+                'margin': self.margin.copy(), 'margin_duals': dict(self.margin_duals),
+                'skipped': self.skipped, 'unchanged': self.unchanged, 'partial_rounds': self.partial_rounds}
+
+    def restore(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def order(self, teams):
+        # Oldest answer first, then most negative reduced cost, then team index; pricing the
+        # same few most-negative teams over and over starves the others
+        teams = list(teams)
+        return [teams[i] for i in np.lexsort((self.last_rc[teams], -self.age[teams]))]
+
+    def dual_change_bound(self, team, duals):
+        # Upper bound on how much the reduced cost of any pattern of team can have decreased
+        # since its margin was measured: rc_t(p) = c(p) - A_t - sum over the N - 1 away games
+        # (s, j) of (R_t,s + R_j,s), so the decrease is dA_t plus the N - 1 largest per-slot
+        # max_j (dR_t,s + dR_j,s), signed (an away game the duals made dearer only helps)
+        delta = np.asarray(duals) - self.margin_duals[team]
+        delta_R = delta[self.N:].reshape(self.N, self.S)
+
+        per_slot = delta_R[team] + delta_R
+        per_slot[team] = -np.inf
+        per_slot = np.sort(per_slot.max(axis=0))[::-1]
+
+        return delta[team] + per_slot[:self.N - 1].sum()
+
+    def can_skip(self, team, duals):
+        if not self.skip_unchanged or self.margin_duals[team] is None:
+            return False
+
+        return self.dual_change_bound(team, duals) < self.margin[team]
+
+    def record(self, team, duals, reduced_cost):
+        # reduced_cost None: improving column of unknown exact value (e.g. from the pool) or
+        # no answer at all
+        self.age += 1
+        self.age[team] = 0
+        if reduced_cost is None:
+            self.last_rc[team] = min(self.last_rc[team], 0)
+        else:
+            self.last_rc[team] = reduced_cost
+
+        if reduced_cost is not None and reduced_cost >= 0:
+            self.margin[team] = reduced_cost
+            self.margin_duals[team] = np.array(duals, dtype=float)
+        else:
+            self.margin[team] = -np.inf
+            self.margin_duals[team] = None
+
+    def full_round(self, improving):
+        # improving: teams with an improving column after pricing all of them
+        self.partial = improving >= self.max_columns
@@ -0,0 +1,204 @@
+import numpy as np
+from abc import ABC, abstractmethod
+from threading import Thread
+from gurobipy import Env
+
+
+class PrimalHeuristic(ABC):
+    # Called by TTPMaster every `every` column generation iterations with the current LP
+    # solution (primal values by store row); returns (objective, patterns) or None
+    def __init__(self, every=10):
+        self.every = every
+        self.calls = 0
+        self.improvements = 0
+
+    def due(self, iteration):
+        return iteration > 0 and iteration % self.every == 0
+
+    @abstractmethod
+    def run(self, master, values):
+        pass
+
+    def poll(self, master):
+        # Result of work left running between iterations, None by default
+        return None
+
+    def close(self):
+        # Ends work left running, called when the run is over
+        pass
+
+    def stats(self):
+        return {'calls': self.calls, 'improvements': self.improvements}
+
+
+def covered_rows(pattern, team, n_slots):
+    # R rows (t * S + s) a column covers: both teams of every away game
+    return [row for s, v in enumerate(pattern) if v != team for row in (team * n_slots + s, v * n_slots + s)]
+
+
+class RoundingHeuristic(PrimalHeuristic):
+    # Depth-first search over the LP support: one column per team, largest values first,
+    # no R row covered twice; a full timetable covers every row exactly once
+    def __init__(self, every=5, max_nodes=2000):
+        super().__init__(every)
+        self.max_nodes = max_nodes
+
+    def run(self, master, values):
+        support = np.flatnonzero(values > 1e-6)
+        rows = {i: covered_rows(master.store.pattern(i), int(master.store.owner[i]), len(master.slots))
+                for i in support.tolist()}
+        candidates = {t: [] for t in master.teams}
+        for i in support[np.argsort(-values[support], kind='stable')].tolist():
+            candidates[int(master.store.owner[i])].append(i)
+
+        # Teams with the fewest candidates first
+        order = sorted(master.teams, key=lambda t: len(candidates[t]))
+        if any(not candidates[t] for t in order):
+            return None
+
+        covered = np.zeros(master.N * len(master.slots), dtype=bool)
+        chosen = []
+        nodes = [0]
+
+        def search(depth):
+            if depth == len(order):
+                return covered.all()
+            nodes[0] += 1
+            if nodes[0] > self.max_nodes:
+                return False
+            for i in candidates[order[depth]]:
+                if covered[rows[i]].any():
+                    continue
+                covered[rows[i]] = True
+                chosen.append(i)
+                if search(depth + 1):
+                    return True
+                chosen.pop()
+                covered[rows[i]] = False
+            return False
+
+        if not search(0):
+            return None
+        return float(master.store.cost[chosen].sum()), master.store.patterns(chosen)
+
+
+class DivingHeuristic(PrimalHeuristic):
+    # Fixes the column with the largest fractional value (as branching rules on every slot
+    # of its team) and reoptimizes with a few column generation iterations, until the LP
+    # is integral or infeasible. The node's rules, bounds, flags, stabilization and pricing
+    # state are restored afterwards; the dive's iterations, trace rows and pricing calls are
+    # not counted in the run's, only in the heuristic's own stats
+    def __init__(self, every=20, iterations=10):
+        super().__init__(every)
+        self.iterations = iterations
+        self.dive_iterations = 0
+        self.dive_calls = 0
+
+    def stats(self):
+        return dict(super().stats(), iterations=self.dive_iterations, exact_calls=self.dive_calls)
+
+    def run(self, master, values):
+        saved = {name: getattr(master, name) for name in
+                 ('optimal', 'gap_stop', 'infeasible', 'lower_bound', 'lp_bound', 'cutoff', 'primals', 'duals',
+                  'iterations', 'partial_sol')}
+        rules = list(master.branch_rules)
+        failures = master.pricing_failures.copy()
+        penalty = master.artificial_penalty
+        best = master.best_sol['objective']
+        calls = dict(master.pricing_calls)
+        rows = len(master.trace)
+        stabilizer = master.stabilizer.snapshot()
+        scheduler = master.scheduler.snapshot() if master.scheduler is not None else None
+
+        fixed = set()
+        try:
+            while len(fixed) < master.N:
+                ids = np.flatnonzero((values > 1e-6) & (values < 1 - 1e-6))
+                ids = ids[~np.isin(master.store.owner[ids], list(fixed))]
+                if len(ids) == 0:
+                    break
+
+                i = int(ids[np.argmax(values[ids])])
+                team = int(master.store.owner[i])
+                fixed.add(team)
+                pattern = master.store.pattern(i)
+                dive = list(master.branch_rules) + [(team, s, v, True) for s, v in enumerate(pattern)]
+
+                master.start_node(dive, best)
+                master.column_generation(max_iterations=self.iterations)
+                if master.infeasible or master.stopped or master.primals is None:
+                    break
+                values = master.primals
+        finally:
+            stopped = master.stopped
+            self.dive_iterations += master.iterations - saved['iterations']
+            self.dive_calls += master.pricing_calls['exact'] - calls['exact']
+            master.start_node(rules, saved['cutoff'])
+            for name, value in saved.items():
+                setattr(master, name, value)
+            master.stopped = stopped
+            master.pricing_calls.update(calls)
+            master.trace.truncate(rows)
+            master.stabilizer.restore(stabilizer)
+            if scheduler is not None:
+                master.scheduler.restore(scheduler)
+            master.pricing_failures[:] = failures
+            if master.artificial_penalty != penalty:
+                master.artificial_penalty = penalty
+                master.master.setAttr('Obj', master.artificials, [penalty] * len(master.artificials))
+
+        # Integral master solutions found on the way are already in best_sol
+        if master.best_sol['objective'] < best:
+            return master.best_sol['objective'], master.best_sol['patterns']
+        return None
+
+
+class RestrictedMasterIP(PrimalHeuristic):
+    # Binary clone of the restricted master solved with a short time limit in a background
+    # thread (own Gurobi environment); the result is collected at a later iteration
+    def __init__(self, every=10, time_limit=5):
+        super().__init__(every)
+        self.time_limit = time_limit
+        self.env = Env(params={'OutputFlag': 0})
+        self.thread = None
+        self.model = None
+        self.result = None
+
+    def run(self, master, values):
+        if self.thread is not None and self.thread.is_alive():
+            return None
+
+        model, x_int, active = master.binary_clone(self.env)
+        model.setParam('TimeLimit', self.time_limit)
+        self.model = model
+        patterns = master.store.patterns(active)
+        costs = master.store.cost[active].copy()
+
+        def solve():
+            model.optimize()
+            if model.SolCount > 0:
+                chosen = np.flatnonzero(np.array(model.getAttr('X', x_int)) >= 0.5)
+                self.result = (float(costs[chosen].sum()), [patterns[k] for k in chosen])
+
+        self.thread = Thread(target=solve, daemon=True)
+        self.thread.start()
+        return None
+
+    def poll(self, master):
+        result, self.result = self.result, None
+        return result
+
+    def close(self):
+        # The background solve must not outlive the run
+        if self.thread is not None and self.thread.is_alive():
+            self.model.terminate()
+            self.thread.join()
+        self.thread = None
+        self.model = None
+
+
+HEURISTICS = {
+    'rounding': RoundingHeuristic,
+    'diving': DivingHeuristic,
+    'restricted_ip': RestrictedMasterIP,
+}
@@ -0,0 +1,37 @@
+from time import time
+
+
+# Attributes the master sets on its sattelites, sent with every call
+SHARED = ('rules', 'time_limit', 'threads', 'columns', 'min_distance')
+
+# Sattelites of this worker process, one per class and instance
+_pricers = dict()
+
+
+def pricer_state(pricer, team):
+    # Everything a fresh copy of pricer needs to answer like it for team
+    state = {name: getattr(pricer, name) for name in SHARED if hasattr(pricer, name)}
+    if hasattr(pricer, 'excluded'):
+        state['excluded'] = pricer.excluded[team]
+    return state
+
+
+def process_solve(satt, instance, state, team, duals):
+    # Runs in a worker process: instance is (n_teams, lower, upper, distances) with hashable
+    # distances. Returns the answer, its time and the team's excluded patterns afterwards
+    # (None for sattelites without them), which the master copies back
+    key = (satt, instance)
+    if key not in _pricers:
+        _pricers[key] = satt(*instance)
+    pricer = _pricers[key]
+
+    excluded = state.pop('excluded', None)
+    for name, value in state.items():
+        setattr(pricer, name, value)
+    if excluded is not None:
+        pricer.excluded[team] = excluded
+
+    start = time()
+    dictionary = pricer.single_solve(team, duals)
+    seconds = time() - start
+    return dictionary, seconds, pricer.excluded[team] if excluded is not None else None
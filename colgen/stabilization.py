@@ -0,0 +1,159 @@
+from gurobipy import Column
+import numpy as np
+
+
+class DualStabilizer:
+    # None: plain Kelley column generation
+    # 'wentges' / 'inout': price at a smoothed point alpha * center + (1 - alpha) * pi (fixed / adaptive alpha)
+    # 'boxstep' / 'dumerle': penalized slacks keep the master duals in a box around the center
+    MODES = (None, 'wentges', 'inout', 'boxstep', 'dumerle')
+
+    def __init__(self, mode=None, alpha=0.5, box_width=None, epsilon=1.0, max_null_steps=50):
+        if mode not in self.MODES:
+            raise ValueError(f'Unknown stabilization mode {mode}, choose one of {self.MODES}')
+
+        self.mode = mode
+        self.alpha = alpha
+        self.box_width = box_width
+        # Slack bound: du Merle halves it on every null step, boxstep keeps it. Never infinite,
+        # master columns have no upper bound and an unbounded slack opens an unbounded ray
+        self.epsilon = epsilon
+        self.max_null_steps = max_null_steps
+
+        self.center = None
+        self.center_bound = -np.inf
+        self.null_steps = 0
+
+        self.plus = []
+        self.minus = []
+
+        self.stats = {
+            'mode': mode,
+            'master_rounds': 0,
+            'pricing_rounds': 0,
+            'mispricings': 0,
+            'center_updates': 0,
+            'null_steps': 0,
+        }
+
+    @property
+    def smoothing(self):
+        return self.mode in ('wentges', 'inout')
+
+    @property
+    def penalized(self):
+        return self.mode in ('boxstep', 'dumerle')
+
+    def attach(self, model, constrs, distances):
+        # One slack per master row and direction, inactive (ub = 0) until there is a center
+        if not self.penalized:
+            return
+
+        if self.box_width is None:
+            self.box_width = float(np.max(distances)) / 2
+
+        self.model = model
+        self.plus = [model.addVar(lb=0, ub=0, column=Column([1], [c]), name=f'stab_plus_{i}')
+                     for i, c in enumerate(constrs)]
+        self.minus = [model.addVar(lb=0, ub=0, column=Column([-1], [c]), name=f'stab_minus_{i}')
+                      for i, c in enumerate(constrs)]
+        model.update()
+
+    def set_box(self):
+        # Dual box [center - width, center + width], slack bounds epsilon
+        self.model.setAttr('Obj', self.plus, (self.center + self.box_width).tolist())
+        self.model.setAttr('Obj', self.minus, (self.box_width - self.center).tolist())
+        self.model.setAttr('UB', self.plus, [self.epsilon] * len(self.plus))
+        self.model.setAttr('UB', self.minus, [self.epsilon] * len(self.minus))
+
+    def release(self):
+        # Back to the unstabilized master
+        self.epsilon = 0
+        if self.plus:
+            self.model.setAttr('UB', self.plus, [0] * len(self.plus))
+            self.model.setAttr('UB', self.minus, [0] * len(self.minus))
+
+    def reset(self):
+        # Forget the center, the slacks stay inactive until the next one
+        self.center = None
+        self.center_bound = -np.inf
+        self.null_steps = 0
+        if self.plus:
+            self.model.setAttr('UB', self.plus, [0] * len(self.plus))
+            self.model.setAttr('UB', self.minus, [0] * len(self.minus))
+
+    def snapshot(self):
+        # Center, step state and counters, for work that must leave no trace (diving)
+        return {'center': None if self.center is None else self.center.copy(), 'center_bound': self.center_bound,
+                'null_steps': self.null_steps, 'alpha': self.alpha, 'epsilon': self.epsilon,
+                'stats': dict(self.stats)}
+
+    def restore(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        if not self.plus:
+            return
+        if self.center is not None and self.epsilon > 0:
+            self.set_box()
+        else:
+            self.model.setAttr('UB', self.plus, [0] * len(self.plus))
+            self.model.setAttr('UB', self.minus, [0] * len(self.minus))
+
+    def slack_total(self):
+        if not self.plus or self.epsilon == 0:
+            return 0.0
+        return float(np.sum(self.model.getAttr('X', self.plus)) + np.sum(self.model.getAttr('X', self.minus)))
+
+    def separation_point(self, duals, mispricings=0):
+        if not self.smoothing or self.center is None:
+            return duals
+
+        # Each mispricing moves the point towards the master duals, alpha = 0 is pure pricing
+        alpha = max(0.0, 1 - (mispricings + 1) * (1 - self.alpha))
+        if alpha <= 0:
+            return duals
+        return alpha * self.center + (1 - alpha) * duals
+
+    def update(self, point, bound):
+        # Serious step when the Lagrangian bound at the priced point improves on the center
+        if self.center is None:
+            self.move_center(point, -np.inf if bound is None else bound)
+            return
+
+        if bound is not None and bound > self.center_bound + 1e-9:
+            self.move_center(point, bound)
+            if self.mode == 'inout':
+                self.alpha = min(0.9, self.alpha + 0.1)
+        elif bound is None and self.smoothing:
+            # Partial rounds give no bound to compare with: follow the priced point
+            # (plain Wentges smoothing) instead of keeping a stale center forever
+            self.move_center(point, self.center_bound)
+
+    def misprice(self):
+        self.stats['mispricings'] += 1
+        if self.mode == 'inout':
+            self.alpha = max(0.0, self.alpha - 0.1)
+
+    def move_center(self, point, bound):
+        self.center = np.array(point, dtype=float)
+        self.center_bound = bound
+        self.stats['center_updates'] += 1
+        if self.penalized and self.epsilon > 0:
+            self.set_box()
+
+    def null_step(self, duals):
+        # No column prices out but the slacks are still in use: recenter on the
+        # master duals and tighten the penalty (du Merle) until it vanishes
+        self.null_steps += 1
+        self.stats['null_steps'] += 1
+        if self.mode == 'dumerle':
+            self.epsilon /= 2
+            if self.epsilon < 1e-3:
+                self.release()
+                return
+
+        if self.null_steps >= self.max_null_steps:
+            self.release()
+            return
+
+        self.move_center(duals, self.center_bound)
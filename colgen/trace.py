@@ -0,0 +1,108 @@
+import csv
+import json
+import numpy as np
+from time import time
+
+
+class ConvergenceTrace:
+    # One row per column generation iteration, kept as columnar arrays that double when full.
+    # Per team: wall time spent pricing, status code of the last answer and its reduced cost.
+    # Solver statistics reported by the sattelites are summed per iteration in extra columns
+    FIELDS = ('iteration', 'elapsed', 'master_obj', 'lp_bound', 'lower_bound', 'master_time',
+              'master_simplex_iters', 'pricing_time', 'columns_added', 'master_size', 'pool_size',
+              'incumbent')
+    COUNTS = ('iteration', 'master_simplex_iters', 'columns_added', 'master_size', 'pool_size')
+    STATUSES = ('Feasible', 'Infeasible', 'Pool', 'Time Limit')
+
+    def __init__(self, n_teams: int, capacity=256):
+        self.N = n_teams
+        self.teams = range(n_teams)
+        self.start = time()
+        self.size = 0
+
+        self.columns = {field: np.full(capacity, np.nan) for field in self.FIELDS}
+        self.team_time = np.zeros((capacity, n_teams))
+        self.team_status = np.full((capacity, n_teams), -1, dtype=np.int8)
+        self.team_rc = np.full((capacity, n_teams), np.nan)
+        self.stats = dict()
+
+    def __len__(self):
+        return self.size
+
+    def grow(self):
+        capacity = 2 * len(self.team_time)
+        for name, old in list(self.columns.items()) + list(self.stats.items()):
+            new = np.full(capacity, np.nan)
+            new[:self.size] = old[:self.size]
+            (self.columns if name in self.columns else self.stats)[name] = new
+
+        for name, fill in (('team_time', 0), ('team_status', -1), ('team_rc', np.nan)):
+            old = getattr(self, name)
+            new = np.full((capacity, self.N), fill, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def truncate(self, size):
+        # Drops the rows from size on (e.g. the iterations of a heuristic dive)
+        for column in list(self.columns.values()) + list(self.stats.values()):
+            column[size:self.size] = np.nan
+        self.team_time[size:self.size] = 0
+        self.team_status[size:self.size] = -1
+        self.team_rc[size:self.size] = np.nan
+        self.size = size
+
+    def new_row(self, iteration):
+        # Opens the row of an iteration, later calls fill the current (last) row
+        if self.size == len(self.team_time):
+            self.grow()
+        self.size += 1
+        self.set(iteration=iteration)
+
+    def set(self, **values):
+        row = self.size - 1
+        for field, value in values.items():
+            self.columns[field][row] = np.nan if value is None else value
+        self.columns['elapsed'][row] = time() - self.start
+
+    def record_team(self, team, seconds, dictionary):
+        # Time adds up over the rounds of an iteration, the last answer gives status and reduced cost
+        row = self.size - 1
+        self.team_time[row, team] += seconds
+        self.team_status[row, team] = self.STATUSES.index(dictionary['status'])
+        self.team_rc[row, team] = dictionary.get('obj_val', np.nan)
+
+        for name, value in dictionary.get('stats', {}).items():
+            column = self.stats.setdefault(f'pricing_{name}', np.full(len(self.team_time), np.nan))
+            column[row] = np.nansum([column[row], value])
+
+    def records(self):
+        # Header and rows, the per-team columns last
+        header = list(self.FIELDS) + list(self.stats)
+        header += [f'{name}_{t}' for t in self.teams for name in ('time', 'status', 'rc')]
+
+        data = [self.columns[field][:self.size] for field in self.FIELDS]
+        data += [column[:self.size] for column in self.stats.values()]
+        statuses = np.array(self.STATUSES + ('',), dtype=object)
+        for t in self.teams:
+            data += [self.team_time[:self.size, t], statuses[self.team_status[:self.size, t]],
+                     self.team_rc[:self.size, t]]
+
+        counts = {header.index(field) for field in self.COUNTS}
+        rows = [[None if isinstance(v, float) and not np.isfinite(v) else int(v) if i in counts else v
+                 for i, v in enumerate(row)]
+                for row in zip(*[column.tolist() for column in data])]
+        return header, rows
+
+    def to_csv(self, path):
+        header, rows = self.records()
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file, delimiter=';')
+            writer.writerow(header)
+            writer.writerows(['' if v is None else v for v in row] for row in rows)
+
+    def to_json(self, path):
+        # Columnar, same layout as in memory
+        header, rows = self.records()
+        columns = {name: list(values) for name, values in zip(header, zip(*rows))} if rows else {name: [] for name in header}
+        with open(path, 'w') as file:
+            json.dump(columns, file)
@@ -1,4 +1,5 @@
 import sys
+import os
 import json
 
 
@@ -9,9 +10,29 @@ n = int(args[2])
 seed = int(args[3])
 matrix = args[4]
 timeout = int(args[5])
+# Optional: directory where the convergence trace of the column generation methods goes
+trace_dir = args[6] if len(args) > 6 else None
+# Optional: checkpoint directory, a timed-out run of the same instance resumes from it
+checkpoint_dir = args[7] if len(args) > 7 else None
+# Optional: column cache directory, shared by every column generation method
+cache_dir = args[8] if len(args) > 8 else None
 
 matrix = [[int(x) for x in line.split(',')] for line in matrix.split(';')]
 
+checkpoint = None
+if checkpoint_dir is not None and method not in ('MIP', 'CP'):
+    from colgen.checkpoint import Checkpoint
+    checkpoint = Checkpoint(checkpoint_dir, n, 1, 3, matrix, seed=seed)
+
+trace_path = None
+if trace_dir is not None:
+    trace_path = os.path.join(trace_dir, f'trace_N_{n}_seed_{seed}.csv')
+
+column_cache = None
+if cache_dir is not None and method not in ('MIP', 'CP'):
+    from colgen.column_cache import ColumnCache
+    column_cache = ColumnCache(cache_dir)
+
 if method == 'MIP':
     from TTP_MILP import TTP
     answer = TTP(n, matrix, 1, 3, timeout=timeout)
@@ -23,13 +44,29 @@ elif method == 'CP':
 elif method == 'IP Gen Col IP':
     from ttp_master import TTPMaster
     from ColGenIP_IP.MIP_col_gen import MIPPatternGenerator
-    solver = TTPMaster(n, matrix, 1, 3, MIPPatternGenerator)
+    solver = TTPMaster(n, matrix, 1, 3, MIPPatternGenerator, checkpoint=checkpoint, column_cache=column_cache,
+                       trace_path=trace_path)
     answer = solver.solve(timeout=timeout)
 
 elif method == 'IP Gen Col CP':
     from ttp_master import TTPMaster
     from ColGenIP_CP.cpgenerator import CPPatternGenerator
-    solver = TTPMaster(n, matrix, 1, 3, CPPatternGenerator)
+    solver = TTPMaster(n, matrix, 1, 3, CPPatternGenerator, checkpoint=checkpoint, column_cache=column_cache,
+                       trace_path=trace_path)
+    answer = solver.solve(timeout=timeout)
+
+elif method == 'B&P IP':
+    from branch_and_price import TTPBranchAndPrice
+    from ColGenIP_IP.MIP_col_gen import MIPPatternGenerator
+    solver = TTPBranchAndPrice(n, matrix, 1, 3, MIPPatternGenerator, checkpoint=checkpoint, column_cache=column_cache,
+                               trace_path=trace_path)
+    answer = solver.solve(timeout=timeout)
+
+elif method == 'B&P CP':
+    from branch_and_price import TTPBranchAndPrice
+    from ColGenIP_CP.cpgenerator import CPPatternGenerator
+    solver = TTPBranchAndPrice(n, matrix, 1, 3, CPPatternGenerator, checkpoint=checkpoint, column_cache=column_cache,
+                               trace_path=trace_path)
     answer = solver.solve(timeout=timeout)
 
 print()
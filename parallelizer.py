@@ -9,6 +9,8 @@ def run_solver(command):
 
 
 def create_file(n, tester, directory):
+    # The branch-and-price methods have no results folder in older instance directories
+    os.makedirs(os.path.join(directory, f'results_{tester}'), exist_ok=True)
     path = os.path.join(directory, f'results_{tester}', f'results_N_{n}.csv')
     with open(path, 'w') as file:
         file.write('seed;pattern;best fractionary solution;best integer solution;status;time\n')
@@ -37,7 +39,7 @@ if __name__ == '__main__':
     loader = TTPInstanceLoader()
 
     N = [4, 6, 8, 10]
-    methods = ['MIP', 'CP', 'IP Gen Col IP', 'IP Gen Col CP']
+    methods = ['MIP', 'CP', 'IP Gen Col IP', 'IP Gen Col CP', 'B&P IP', 'B&P CP']
     TIMEOUT = 7200
 
     POBLATE = False
@@ -59,7 +61,10 @@ if __name__ == '__main__':
     create_error_file()
 
     commands = [
-        ['python', 'parallel_solve.py', method, str(n), str(seed), str(matrices[n][seed]), str(TIMEOUT)] 
+        ['python', 'parallel_solve.py', method, str(n), str(seed), str(matrices[n][seed]), str(TIMEOUT),
+         os.path.join(loader.directory, f'results_{method}'),
+         os.path.join(loader.directory, f'results_{method}', 'checkpoints'),
+         os.path.join(loader.directory, 'column_cache')] 
         for n in N for seed in seeds[n] for method in methods
     ]
 
@@ -1,7 +1,9 @@
+import os
 from inst_gen.instance_loader import TTPInstanceLoader
 from ttp_master import TTPMaster
 from ColGenIP_CP.cpgenerator import CPPatternGenerator
 from ColGenIP_IP.MIP_col_gen import MIPPatternGenerator
+from colgen.column_cache import ColumnCache
 from TTP_MILP import TTP
 from cpsolver import CPSolver
 
@@ -12,6 +14,8 @@ N = [4, 6, 8, 10]
 quant = 5
 
 loader = TTPInstanceLoader()
+# Columns shared by the column generation methods and by reruns of the campaign
+column_cache = ColumnCache(os.path.join(loader.directory, 'column_cache'))
 
 if POBLATE:
     for n in N:
@@ -39,7 +43,7 @@ for n in N:
             if method in ["CP", "MIP"]:
                 ans = methods[method](n, distance_matrix, 1, 3, timeout=TIMEOUT)
             else:
-                solver = methods[method][0](n, distance_matrix, 1, 3, methods[method][1])
+                solver = methods[method][0](n, distance_matrix, 1, 3, methods[method][1], column_cache=column_cache)
                 ans = solver.solve(timeout=TIMEOUT)
 
             loader.save_info(n, seed, method, ans)
@@ -0,0 +1,22 @@
+import numpy as np
+
+from colgen.checkpoint import instance_key
+
+
+DISTANCES = [[0, 10, 20], [10, 0, 15], [20, 15, 0]]
+
+
+def test_key_ignores_the_dtype_of_whole_distances():
+    key = instance_key(3, 1, 3, DISTANCES)
+    assert instance_key(3, 1, 3, np.array(DISTANCES, dtype=np.int32)) == key
+    assert instance_key(3, 1, 3, np.array(DISTANCES, dtype=float)) == key
+    assert instance_key(3, 1, 2, DISTANCES) != key
+
+
+def test_fractional_distances_get_their_own_key():
+    whole = np.array(DISTANCES, dtype=float)
+    fractional = whole + 0.25 * (whole > 0)
+    # Truncating to integers would give both the same key
+    assert instance_key(3, 1, 3, fractional) != instance_key(3, 1, 3, whole)
+    assert instance_key(3, 1, 3, fractional + 0.25 * (whole > 0)) != instance_key(3, 1, 3, fractional)
+    assert instance_key(3, 1, 3, fractional.copy()) == instance_key(3, 1, 3, fractional)
@@ -0,0 +1,29 @@
+import numpy as np
+
+from colgen.column_aging import ColumnAging
+
+
+def test_purged_column_can_be_purged_again_later():
+    aging = ColumnAging(max_columns=2, max_age=2, keep_ratio=0.5)
+    ids = np.arange(4)
+    basic = np.array([True, True, False, False])
+    rc = np.array([0.0, 0.0, 5.0, 3.0])
+
+    for _ in range(2):
+        aging.update(ids, basic, rc)
+    assert aging.select(ids).tolist() == [2, 3]
+
+    # Back from the pool: purgeable again, but only after twice as many rounds
+    for _ in range(3):
+        aging.update(ids, basic, rc)
+    assert aging.select(ids).tolist() == []
+    aging.update(ids, basic, rc)
+    assert aging.select(ids).tolist() == [2, 3]
+    assert aging.purges.tolist()[:4] == [0, 0, 2, 2]
+
+
+def test_no_purge_below_the_size_threshold():
+    aging = ColumnAging(max_columns=4, max_age=1)
+    ids = np.arange(3)
+    aging.update(ids, np.zeros(3, dtype=bool), np.ones(3))
+    assert aging.select(ids).tolist() == []
@@ -0,0 +1,44 @@
+import os
+
+from colgen.checkpoint import instance_key
+from colgen.column_cache import ColumnCache
+from colgen.pattern_store import PatternStore
+
+
+DISTANCES = [[0, 10, 20, 30], [10, 0, 15, 25], [20, 15, 0, 12], [30, 25, 12, 0]]
+
+
+def cached_instances(cache, uppers):
+    # One entry per upper bound, same columns; returns their paths
+    store = PatternStore(4, DISTANCES)
+    store.add(0, (0, 0, 0, 1, 2, 3))
+    store.add(1, (1, 1, 1, 0, 2, 3))
+    for upper in uppers:
+        cache.put(4, 1, upper, DISTANCES, store)
+    return [cache.path(instance_key(4, 1, upper, DISTANCES)) for upper in uppers]
+
+
+def test_least_recently_used_entries_go_first(tmp_path):
+    cache = ColumnCache(str(tmp_path))
+    paths = cached_instances(cache, (3, 4, 5, 6))
+    for path, mtime in zip(paths, (400, 100, 300, 200)):
+        os.utime(path, (mtime, mtime))
+
+    # A read makes the entry the most recently used one
+    assert cache.get(4, 1, 4, DISTANCES)
+
+    sizes = [os.path.getsize(path) for path in paths]
+    cache.max_bytes = sum(sizes) - sizes[3] - sizes[2]
+    cache.evict()
+    assert [os.path.exists(path) for path in paths] == [True, True, False, False]
+
+
+def test_kept_entry_is_never_evicted(tmp_path):
+    cache = ColumnCache(str(tmp_path))
+    paths = cached_instances(cache, (3, 4))
+    for path, mtime in zip(paths, (100, 200)):
+        os.utime(path, (mtime, mtime))
+
+    cache.max_bytes = 0
+    cache.evict(keep=instance_key(4, 1, 3, DISTANCES))
+    assert [os.path.exists(path) for path in paths] == [True, False]
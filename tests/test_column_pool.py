@@ -0,0 +1,46 @@
+import numpy as np
+
+from colgen.column_pool import ColumnPool
+from colgen.pattern_store import PatternStore
+from inst_gen.generator import generate_distance_matrix
+
+
+def direct_reduced_cost(store, duals, row):
+    n, S = store.N, store.S
+    R = np.asarray(duals[n:]).reshape(n, S)
+    t, p = int(store.owner[row]), store.matrix[row]
+    return store.cost[row] - duals[t] - sum(R[t, s] + R[p[s], s] for s in range(S) if p[s] != t)
+
+
+def filled_pool(n=4, seed=0):
+    store = PatternStore(n, generate_distance_matrix(n, seed=seed))
+    pool = ColumnPool(store)
+    rng = np.random.default_rng(seed)
+    for _ in range(30):
+        team = int(rng.integers(n))
+        away = [j for j in range(n) if j != team]
+        pattern = rng.permutation(away + [team] * (n - 1))
+        pool.add(team, tuple(int(v) for v in pattern))
+    return store, pool
+
+
+def test_pool_reduced_costs_match_a_direct_computation():
+    store, pool = filled_pool()
+    duals = np.random.default_rng(1).uniform(-40, 120, store.N + store.N * store.S)
+    for team in range(store.N):
+        expected = [direct_reduced_cost(store, duals, row) for row in pool.rows(team)]
+        assert np.allclose(pool.team_reduced_costs(team, duals), expected)
+
+
+def test_price_takes_the_cheapest_negative_patterns_out():
+    store, pool = filled_pool()
+    duals = np.random.default_rng(2).uniform(-40, 120, store.N + store.N * store.S)
+    team = 0
+    rows = pool.rows(team)
+    rc = {store.pattern(row): direct_reduced_cost(store, duals, row) for row in rows}
+    negative = sorted((value, pattern) for pattern, value in rc.items() if value < -1e-6)
+
+    priced = pool.price(team, duals, limit=2)
+    assert priced == [pattern for _, pattern in negative[:2]]
+    assert all(pattern not in pool for pattern in priced)
+    assert len(pool.rows(team)) == len(rows) - len(priced)
@@ -0,0 +1,15 @@
+from colgen.column_selection import diverse_columns
+
+
+def test_cheapest_first_without_duplicates_or_nonnegative():
+    candidates = [(-1.0, (0, 0, 1, 2)), (-5.0, (1, 2, 0, 0)), (-5.0, (1, 2, 0, 0)),
+                  (0.0, (2, 1, 0, 0)), (-3.0, (0, 1, 2, 0))]
+    assert diverse_columns(candidates, 5) == [(1, 2, 0, 0), (0, 1, 2, 0), (0, 0, 1, 2)]
+    assert diverse_columns(candidates, 2) == [(1, 2, 0, 0), (0, 1, 2, 0)]
+
+
+def test_patterns_too_close_to_a_picked_one_are_skipped():
+    candidates = [(-5.0, (1, 2, 0, 0)), (-4.0, (2, 1, 0, 0)), (-3.0, (0, 0, 1, 2)), (-2.0, (0, 0, 2, 1))]
+    # (2, 1, 0, 0) differs from (1, 2, 0, 0) in two slots only
+    assert diverse_columns(candidates, 4, min_distance=3) == [(1, 2, 0, 0), (0, 0, 1, 2)]
+    assert diverse_columns(candidates, 4, min_distance=2) == [p for _, p in candidates]
@@ -0,0 +1,33 @@
+import numpy as np
+
+from colgen.derived_columns import derive_patterns
+from colgen.initial_schedule import initial_schedules, window_violations
+
+
+def is_pattern(row, team, n):
+    # N - 1 home games and one away game at every other venue
+    counts = np.bincount(row, minlength=n)
+    return counts[team] == n - 1 and all(counts[j] == 1 for j in range(n) if j != team)
+
+
+def test_derived_patterns_stay_feasible_and_new():
+    n, lower, upper = 6, 1, 3
+    patterns = [p for schedule in initial_schedules(n, lower, upper, n_schedules=2, seed=1) for p in schedule]
+    teams = [t for _ in range(len(patterns) // n) for t in range(n)]
+
+    D, owners = derive_patterns(patterns, teams, lower, upper, transforms=('reverse', 'trips', 'swap'))
+    assert len(D)
+    assert window_violations(D == owners[:, None], lower, upper).sum() == 0
+    assert all(is_pattern(row, team, n) for row, team in zip(D, owners))
+
+    keys = {(int(t), tuple(int(v) for v in row)) for row, t in zip(D, owners)}
+    assert len(keys) == len(D)
+    assert not keys & {(t, tuple(p)) for p, t in zip(patterns, teams)}
+
+
+def test_infeasible_derivations_are_dropped():
+    D, owners = derive_patterns([(1, 2, 3, 0, 0, 0)], [0], 1, 3)
+    assert D.tolist() == [[0, 0, 0, 3, 2, 1]]
+    # With U = 2 the three home games in a row break the window, reversed too
+    D, owners = derive_patterns([(1, 0, 0, 0, 2, 3)], [0], 1, 2)
+    assert len(D) == 0
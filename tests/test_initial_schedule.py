@@ -0,0 +1,43 @@
+import numpy as np
+
+from colgen.initial_schedule import initial_schedules, window_violations
+
+
+def check_timetable(schedule, lower, upper):
+    n = len(schedule)
+    P = np.array(schedule)
+    teams = np.arange(n)[:, None]
+    home = P == teams
+
+    # Every window meets L / U, the same check as the sattelites
+    assert window_violations(home, lower, upper).sum() == 0
+
+    # Opponent per slot: the venue when away, the team hosted there when at home
+    opponent = np.where(home, -1, P)
+    for s in range(P.shape[1]):
+        for t in np.flatnonzero(home[:, s]):
+            guests = np.flatnonzero(~home[:, s] & (P[:, s] == t))
+            assert len(guests) == 1
+            opponent[t, s] = guests[0]
+    assert (opponent[opponent, np.arange(P.shape[1])] == np.arange(n)[:, None]).all()
+
+    for t in range(n):
+        # Each other team once at home and once away, never twice in a row
+        others = [j for j in range(n) if j != t]
+        assert sorted(opponent[t][home[t]]) == others
+        assert sorted(opponent[t][~home[t]]) == others
+        assert (opponent[t, 1:] != opponent[t, :-1]).all()
+
+
+def test_schedules_meet_the_windows_and_never_repeat():
+    for n, lower, upper in ((4, 1, 3), (6, 1, 3), (8, 1, 3), (6, 1, 2)):
+        schedules = initial_schedules(n, lower, upper, n_schedules=3, seed=n)
+        assert schedules
+        for schedule in schedules:
+            check_timetable(schedule, lower, upper)
+
+
+def test_schedules_are_distinct_and_reproducible():
+    schedules = initial_schedules(6, 1, 3, n_schedules=4, seed=5)
+    assert len({tuple(schedule) for schedule in schedules}) == len(schedules)
+    assert initial_schedules(6, 1, 3, n_schedules=4, seed=5) == schedules
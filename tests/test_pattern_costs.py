@@ -0,0 +1,41 @@
+import numpy as np
+
+from colgen.pattern_costs import pattern_costs, reduced_costs
+from inst_gen.generator import generate_distance_matrix
+
+
+def loop_cost(distances, team, pattern):
+    # Same loop as the solvers' original get_pattern_cost
+    cost = distances[team][pattern[0]]
+    for s in range(len(pattern) - 1):
+        cost += distances[pattern[s]][pattern[s + 1]]
+    return cost + distances[pattern[-1]][team]
+
+
+def random_patterns(n, k, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(n, size=(k, 2 * n - 2)), rng.integers(n, size=k)
+
+
+def test_costs_match_the_loop():
+    n = 6
+    distances = generate_distance_matrix(n, seed=1)
+    P, teams = random_patterns(n, 50)
+
+    costs = pattern_costs(distances, P, teams)
+    assert costs.tolist() == [loop_cost(distances, t, p.tolist()) for p, t in zip(P, teams)]
+    # A single pattern and a single owner
+    assert pattern_costs(distances, tuple(P[0]), teams[0]).tolist() == [costs[0]]
+
+
+def test_reduced_costs_match_a_direct_computation():
+    n = 5
+    S = 2 * n - 2
+    P, teams = random_patterns(n, 40, seed=2)
+    costs = np.random.default_rng(3).uniform(0, 100, len(P))
+    duals = np.random.default_rng(4).uniform(-50, 50, n + n * S)
+    R = duals[n:].reshape(n, S)
+
+    expected = [c - duals[t] - sum(R[t, s] + R[p[s], s] for s in range(S) if p[s] != t)
+                for p, t, c in zip(P, teams, costs)]
+    assert np.allclose(reduced_costs(duals, P, teams, costs), expected)
@@ -0,0 +1,52 @@
+import numpy as np
+
+from colgen.pattern_store import PatternStore
+
+
+DISTANCES = [[0, 10, 20, 30], [10, 0, 15, 25], [20, 15, 0, 12], [30, 25, 12, 0]]
+
+
+def test_add_keeps_first_row_and_state():
+    store = PatternStore(4, DISTANCES)
+    row = store.add(0, (0, 0, 0, 1, 2, 3))
+    assert store.add(0, (0, 0, 0, 1, 2, 3), state=PatternStore.POOL) == row
+    assert store.state[row] == PatternStore.MASTER
+    assert len(store) == 1
+    assert (0, 0, 0, 1, 2, 3) in store
+    assert store.team_of((0, 0, 0, 1, 2, 3)) == 0
+    # Home, home, home, then at 1, 2 and 3 and back: 10 + 15 + 12 + 30
+    assert store.cost[row] == 67
+
+
+def test_state_transitions():
+    store = PatternStore(4, DISTANCES)
+    a = store.add(0, (0, 0, 0, 1, 2, 3))
+    b = store.add(1, (1, 1, 1, 0, 2, 3), state=PatternStore.POOL)
+    c = store.add(0, (1, 2, 3, 0, 0, 0), state=PatternStore.POOL)
+
+    assert store.active_rows().tolist() == [a]
+    assert store.rows_in(PatternStore.POOL).tolist() == [b, c]
+    assert store.rows_in(PatternStore.POOL, team=0).tolist() == [c]
+
+    # Pool to master, master to dropped; versions move only for the owners
+    version = store.version.copy()
+    store.set_state([c], PatternStore.MASTER)
+    store.set_state(a, PatternStore.DROPPED)
+    assert store.active_rows().tolist() == [c]
+    assert store.rows_in(PatternStore.DROPPED).tolist() == [a]
+    assert (store.version - version).tolist() == [2, 0, 0, 0]
+
+
+def test_growth_and_round_trip():
+    store = PatternStore(4, DISTANCES, capacity=1)
+    rng = np.random.default_rng(0)
+    patterns = {tuple(rng.integers(0, 4, 6).tolist()) for _ in range(200)}
+    rows = {p: store.add(0, p, cost=1.0, state=PatternStore.POOL if i % 2 else PatternStore.MASTER)
+            for i, p in enumerate(sorted(patterns))}
+    assert all(store.row_of(p) == row for p, row in rows.items())
+
+    copy = PatternStore.from_arrays(store.arrays(), DISTANCES)
+    assert len(copy) == len(store)
+    assert np.array_equal(copy.rows(), store.rows())
+    assert np.array_equal(copy.state[:len(copy)], store.state[:len(store)])
+    assert copy.active_rows().tolist() == store.active_rows().tolist()
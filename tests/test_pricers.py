@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from inst_gen.generator import generate_distance_matrix
+from ColGenIP_DP.dpgenerator import DPPatternGenerator
+from ColGenIP_Enum.enumgenerator import EnumPatternGenerator
+
+
+def random_duals(rng, n):
+    return rng.uniform(-50, 150, n + n * (2 * n - 2))
+
+
+@pytest.mark.parametrize('n', [4, 6])
+def test_dp_matches_enumeration(n):
+    rng = np.random.default_rng(n)
+    distances = generate_distance_matrix(n, seed=n)
+    dp = DPPatternGenerator(n, 1, 3, distances)
+    enum = EnumPatternGenerator(n, 1, 3, distances)
+
+    # Several rounds per team, so the later ones are pruned against the earlier patterns
+    for _ in range(3):
+        for home in range(n):
+            pi = random_duals(rng, n)
+            expected = enum.single_solve(home, pi)
+            answer = dp.single_solve(home, pi)
+            assert answer['status'] == expected['status'] == 'Feasible'
+            assert answer['obj_val'] == pytest.approx(expected['obj_val'])
+
+
+def test_dp_matches_enumeration_under_rules():
+    n = 6
+    rng = np.random.default_rng(1)
+    distances = generate_distance_matrix(n, seed=1)
+    dp = DPPatternGenerator(n, 1, 3, distances)
+    enum = EnumPatternGenerator(n, 1, 3, distances)
+
+    # Team 0 away at 2 in slot 0, not at home in slot 3
+    rules = {t: [] for t in range(n)}
+    rules[0] = [(0, 2, True), (3, 0, False)]
+    dp.rules = enum.rules = rules
+
+    for _ in range(3):
+        pi = random_duals(rng, n)
+        expected = enum.single_solve(0, pi)
+        answer = dp.single_solve(0, pi)
+        assert answer['obj_val'] == pytest.approx(expected['obj_val'])
+        assert answer['pattern'][0] == 2 and answer['pattern'][3] != 0
+
+
+def test_dp_time_limit():
+    dp = DPPatternGenerator(6, 1, 3, generate_distance_matrix(6, seed=0))
+    dp.time_limit = -1
+    assert dp.single_solve(0, random_duals(np.random.default_rng(0), 6))['status'] == 'Time Limit'
+
+
+def test_dp_skips_excluded_patterns():
+    # At fixed duals, every call excludes its answer: the DP walks the patterns in
+    # reduced-cost order like the enumeration does
+    n = 6
+    rng = np.random.default_rng(3)
+    distances = generate_distance_matrix(n, seed=3)
+    dp = DPPatternGenerator(n, 1, 3, distances)
+    enum = EnumPatternGenerator(n, 1, 3, distances)
+    pi = rng.uniform(0, 300, n + n * (2 * n - 2))
+
+    expected = [enum.single_solve(0, pi)['obj_val'] for _ in range(40)]
+    found = [dp.single_solve(0, pi)['obj_val'] for _ in range(40)]
+    assert found == pytest.approx(expected)
+    assert dp.excluded[0] == enum.excluded[0]
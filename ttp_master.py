@@ -1,24 +1,101 @@
-from gurobipy import GRB, Model, Column
+from gurobipy import GRB, Model, Column, Env
 from gurobipy import quicksum 
+import numpy as np
 from time import time
 from threading import Thread
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import multiprocessing
+from colgen.pattern_store import PatternStore
+from colgen.pattern_costs import pattern_costs, reduced_costs
+from colgen.column_pool import ColumnPool
+from colgen.pricing_scheduler import PricingScheduler
+from colgen.stabilization import DualStabilizer
+from colgen.column_aging import ColumnAging
+from colgen.initial_schedule import initial_schedules
+from colgen.deadline import Deadline
+from colgen.trace import ConvergenceTrace
+from colgen.derived_columns import derive_patterns
+from colgen.primal_heuristics import PrimalHeuristic, HEURISTICS
+from colgen.process_pricing import process_solve, pricer_state
 
 
 class TTPMaster:
-    def __init__(self, n_teams: int, distances: list, lower: int, upper: int, satt1=None, satt2=None, patterns=[], verbose=False):
+    def __init__(self, n_teams: int, distances: list, lower: int, upper: int, satt1=None, satt2=None, patterns=[], verbose=False,
+                 use_pool=True, pool_columns=1, pricing_workers=1, solver_threads=0,
+                 partial_pricing=None, stabilization=None,
+                 max_columns=None, max_age=10, purge_rc=1e-6, gap_tolerance=None, env=None,
+                 artificial_penalty=None, n_schedules=1, deadline=None, phase_fractions=None,
+                 checkpoint=None, column_cache=None, mip_gap=None, pool_solutions=None, heuristics=None,
+                 derived_columns=None, derived_limit=1, pricing_columns=1, column_distance=1,
+                 pricing_backend='thread', trace_path=None, integer_pool=500):
         self.N = n_teams
         self.teams = range(n_teams)
         self.slots = range(2 * n_teams - 2)
 
         self.distances = distances
-        self.patterns = patterns
+        self.D = np.asarray(distances)
+        self.patterns = list(patterns)
         self.VERBOSE = verbose
 
         self.lower = lower
         self.upper = upper
 
-        self.master = Model()
+        self.env = env
+        self.master = Model(env=env)
         self.master.Params.OutputFlag = 0
+
+        # Known patterns outside the master, priced before calling the sattelites
+        self.store = PatternStore(n_teams, distances)
+        self.pool = ColumnPool(self.store)
+        self.use_pool = use_pool
+        self.pool_columns = pool_columns
+        self.pricing_calls = {'pool': 0, 'exact': 0}
+
+        # Columns price out below -rc_tolerance; exact pricers (DP) return master columns at ~0
+        self.rc_tolerance = 1e-6
+
+        # partial_pricing: stop a round after that many improving columns (None = price every team)
+        self.scheduler = None
+        if partial_pricing:
+            self.scheduler = PricingScheduler(n_teams, partial_pricing)
+
+        # stabilization: a DualStabilizer or one of its modes ('wentges', 'inout', 'boxstep', 'dumerle')
+        if isinstance(stabilization, DualStabilizer):
+            self.stabilizer = stabilization
+        else:
+            self.stabilizer = DualStabilizer(stabilization)
+
+        # derived_columns: transformations ('reverse', 'trips', 'swap') applied to every priced
+        # column; up to derived_limit derived columns per team that price out enter with it
+        self.derived_columns = tuple(derived_columns or ())
+        self.derived_limit = derived_limit
+        self.derived_count = 0
+
+        # Columns nonbasic for max_age rounds move to the pool once the master exceeds max_columns
+        self.aging = None
+        if max_columns:
+            self.aging = ColumnAging(max_columns, max_age, purge_rc)
+
+        # Stop column generation once the LP value or the best integer solution is
+        # within gap_tolerance (relative) of the Lagrangian bound
+        self.gap_tolerance = gap_tolerance
+        self.lower_bound = -np.inf
+        self.lp_bound = np.inf
+        self.gap_stop = False
+        self.integral_costs = np.issubdtype(self.D.dtype, np.integer)
+
+        # Penalized artificial column per master row (phase I in one go): the master is
+        # feasible from the first iteration, the penalty grows while artificials stay in use
+        self.artificials = []
+        self.artificial_penalty = artificial_penalty
+        self.max_penalty = None
+
+        # Branch-and-price state: rules (team, slot, venue, forced) of the current node
+        # and the node's cutoff (best known integer value)
+        self.branch_rules = []
+        self.cutoff = np.inf
+        self.infeasible = False
+        self.pricing_failures = np.zeros(n_teams, dtype=int)
         
         if satt1 and satt2:
             self.sattelite1 = satt1(n_teams, lower, upper, distances)
@@ -34,6 +111,20 @@ class TTPMaster:
 
         else:
             print("No elegiste ningun problema satelite por lo que no se puede resolver")
+
+        self.pricing_workers = pricing_workers
+        # 'thread': the workers overlap only the time the solvers spend outside the GIL
+        # (Gurobi / CP-SAT search), model building and the DP run one team at a time.
+        # 'process': one sattelite copy per worker process, everything runs in parallel;
+        # needs a single sattelite and a __main__ guard in the calling script
+        self.pricing_backend = pricing_backend
+        self.executor = None
+        self.solver_threads = solver_threads
+        # Improving columns per pricing call (cheapest first, pairwise at least
+        # column_distance slots apart), all added to the master in the same round
+        self.pricing_columns = pricing_columns
+        self.column_distance = column_distance
+        self.set_pricers(satt1, satt2)
             
         self.best_sol = {'objective': float('inf'), 'patterns': []}
         self.partial_sol = {'objective': float('inf'), 'patterns': [], 'vars': []}
@@ -41,345 +132,995 @@ class TTPMaster:
         self.start_time = None
         self.elapsed_time = None
 
+        # Run budget shared by the master, every pricing call and the integer phase;
+        # solve() creates one from its timeout when none is given
+        self.deadline = deadline
+        self.phase_fractions = phase_fractions
+
+        # One record per column generation iteration, see ConvergenceTrace.FIELDS
+        self.trace = ConvergenceTrace(n_teams)
+        # Written by solve() when given: JSON for a .json path, CSV otherwise
+        self.trace_path = trace_path
+
+        # Constructive double round robins seeding the master (and the first incumbent)
+        self.n_schedules = n_schedules
+
+        # Integer phase: Gurobi MIPGap and PoolSolutions (None = Gurobi defaults)
+        self.mip_gap = mip_gap
+        self.pool_solutions = pool_solutions
+        # Pool columns added to the integer clone: the integer_pool cheapest at the last duals
+        # (None = the whole pool), the pool also holds every column cache load
+        self.integer_pool = integer_pool
+
+        # Primal heuristics run during column generation: PrimalHeuristic instances or names
+        # ('rounding', 'diving', 'restricted_ip'), each every heuristic.every iterations
+        self.heuristics = [h if isinstance(h, PrimalHeuristic) else HEURISTICS[h]() for h in heuristics or []]
+        self.in_heuristic = False
+
         self.optimal = False
         self.solved = False
         self.timeout = False
+        self.stopped = False
+        # Gurobi status that ended column generation when it was neither a solution nor a stop
+        self.master_status = None
+        # Exception raised inside the column generation thread, reported by solve()
+        self.error = None
+        self.primals = None
+        self.duals = None
         self.iterations = 0
 
+        # checkpoint: a colgen.checkpoint.Checkpoint, saved periodically and resumed from if it exists
+        self.checkpoint = checkpoint
+        saved = checkpoint.load() if checkpoint is not None else None
+
         if not self.patterns:
             self.set_initial_patterns()
 
         self.initialize()
+        if saved is not None:
+            self.resume(saved)
+
+        # column_cache: a colgen.column_cache.ColumnCache shared by runs on the same instance;
+        # its columns start in the pool, this run's columns are added to it at the end
+        self.column_cache = column_cache
+        if column_cache is not None:
+            for team, pattern in column_cache.get(n_teams, lower, upper, self.D):
+                self.pool_column(pattern, team)
 
     def initialize(self):
         self.create_aux_sets()
         self.set_vars()
         self.set_constrs()
-        self.set_costs()
         self.set_objective()
+        self.stabilizer.attach(self.master, self.constrs, self.D)
+        self.add_artificials(self.artificial_penalty)
+
+    def set_pricers(self, satt1, satt2):
+        # One sattelite per team when pricing in parallel, the shared one otherwise
+        self.pricers1 = {t: self.sattelite1 for t in self.teams}
+        self.pricers2 = {t: self.sattelite2 for t in self.teams}
+
+        if self.pricing_workers > 1:
+            satt1, satt2 = (satt1, satt2) if satt1 else (satt2, None)
+            self.pricers1 = {t: self.new_pricer(satt1) for t in self.teams}
+            if satt2:
+                self.pricers2 = {t: self.new_pricer(satt2) for t in self.teams}
+
+        for pricer in self.all_pricers():
+            pricer.threads = self.solver_threads
+            pricer.columns = self.pricing_columns
+            pricer.min_distance = self.column_distance
+            if self.env is not None and self.pricing_workers <= 1 and hasattr(pricer, 'env'):
+                pricer.env = self.env
+
+    def all_pricers(self):
+        pricers = list(self.pricers1.values()) + list(self.pricers2.values())
+        return [p for i, p in enumerate(pricers) if p is not None and p not in pricers[:i]]
+
+    def new_pricer(self, satt):
+        pricer = satt(self.N, self.lower, self.upper, self.distances)
+        if hasattr(pricer, 'env'):
+            # Gurobi environments are not shared between threads
+            pricer.env = Env(params={'OutputFlag': 0})
+        return pricer
 
     def create_aux_sets(self):
-        self.set_team_patterns()
-        self.set_home_patterns()
-        self.set_away_patterns()
+        # Initial columns, ids are store rows (duplicates in the input are dropped)
+        for p in self.patterns:
+            self.store.add(self.store.team_of(p), p)
+        self.patterns = None
 
     def set_initial_patterns(self):
+        # Patterns of complete timetables are feasible together, each one is an integer solution
         self.patterns = []
+        for schedule in initial_schedules(self.N, self.lower, self.upper, self.n_schedules):
+            objective = float(pattern_costs(self.D, schedule, list(self.teams)).sum())
+            if objective < self.best_sol['objective']:
+                self.best_sol = {'objective': objective, 'patterns': list(schedule)}
+            self.patterns.extend(p for p in schedule if p not in self.patterns)
+
+        if self.patterns:
+            return
+
+        # No timetable found for this L/U, one sattelite pattern per team instead
         for i in self.teams:
             ans = self.sattelite1.single_gen_solve(i)
             if ans['status'] == 'Feasible':
                 self.patterns.append(ans['pattern'])
 
-    def set_team_patterns(self):
-        p_t = dict() 
-        for t in self.teams:
-            p_t[t] = []
-            for p in range(len(self.patterns)):
-                home_counts = sum(self.patterns[p][s] == t 
-                                  for s in self.slots)
-                if  home_counts == self.N - 1:
-                    p_t[t].append(p)
-
-        self.team_patterns = p_t
-
-    def set_home_patterns(self):
-        home_t_s = dict()
-        for t in self.teams:
-            for s in self.slots:
-                home_t_s[t, s] = []
-                for j in self.teams:
-                    if j != t:
-                        for p in self.team_patterns[j]:
-                            if self.patterns[p][s] == t:
-                                home_t_s[t, s].append(p)
-
-        self.home_t_s = home_t_s
-
-    def set_away_patterns(self):
-        away_t_s = dict()
-        for t in self.teams:
-            for s in self.slots:
-                away_t_s[t, s] = set()
-                for p in self.team_patterns[t]:
-                    if self.patterns[p][s] != t:
-                        away_t_s[t, s].add(p)
-
-        self.away_t_s = away_t_s
-
     def get_pattern_cost(self, team, pattern):
-        cost = self.distances[team][pattern[0]]
+        return float(pattern_costs(self.D, pattern, team)[0])
 
-        for s in self.slots[:len(self.slots) - 1]:
-            cost += self.distances[pattern[s]][pattern[s + 1]]
-
-        cost += self.distances[pattern[-1]][team]
-        return cost
-
-    def set_costs(self):
-        self.costs = dict()
-        for t in self.teams:
-            for p in self.team_patterns[t]:
-                self.costs[p] = self.get_pattern_cost(t, self.patterns[p])
+    @property
+    def costs(self):
+        # Cached in the store, computed once per pattern
+        return self.store.costs()
 
     def set_vars(self):
-        self.x = [self.master.addVar(vtype=GRB.CONTINUOUS, lb=0, ub=1, name=f'x_{i}') 
-                  for i in range(len(self.patterns))]
+        # Indexed by store row, None for rows outside the master. No upper bound: Asignacion
+        # already caps x at 1, and a column resting at ub = 1 would keep a negative reduced
+        # cost that the sattelites return again and again
+        self.x = [self.master.addVar(vtype=GRB.CONTINUOUS, lb=0, ub=GRB.INFINITY, name=f'x_{i}') 
+                  for i in range(len(self.store))]
 
     def set_constrs(self):
+        team_patterns, home_t_s, away_t_s = self.store.postings(range(len(self.store)))
+        self.slot_constrs = []
         for t in self.teams: 
             for s in self.slots:
-                self.master.addConstr(
-                    (quicksum(self.x[i] for i in self.home_t_s[t, s]) 
-                     + quicksum(self.x[i] for i in self.away_t_s[t, s]) == 1),
+                self.slot_constrs.append(self.master.addConstr(
+                    (quicksum(self.x[i] for i in home_t_s[t, s]) 
+                     + quicksum(self.x[i] for i in away_t_s[t, s]) == 1),
                     name=f"R_{t}_{s}"
-                )
+                ))
 
+        self.assign_constrs = []
         for t in self.teams:
-            self.master.addConstr(quicksum(self.x[i] 
-                                           for i in self.team_patterns[t]) == 1,
-                                           f"Asignacion_{t}")
+            self.assign_constrs.append(self.master.addConstr(quicksum(self.x[i] 
+                                           for i in team_patterns[t]) == 1,
+                                           f"Asignacion_{t}"))
+
+        # Same order as the dual vector handed to the sattelites
+        self.constrs = self.assign_constrs + self.slot_constrs
 
     def set_objective(self):
-        self.master.setObjective(quicksum(self.x[i] * self.costs[i] 
-                                          for i in range(len(self.patterns))), 
+        self.master.setObjective(quicksum(self.x[i] * float(self.costs[i]) 
+                                          for i in range(len(self.store))), 
                                           GRB.MINIMIZE)
+    def add_artificials(self, penalty=None):
+        # One artificial per master row, priced above any schedule so the master is
+        # feasible under every branching decision
+        if self.artificials:
+            return
+
+        if penalty is None:
+            penalty = float(self.N * (len(self.slots) + 1) * max(1, self.D.max()))
+        self.artificial_penalty = penalty
+        self.max_penalty = 1e3 * penalty
+        self.artificials = [self.master.addVar(lb=0, obj=penalty, column=Column([1], [c]), name=f'art_{i}')
+                            for i, c in enumerate(self.constrs)]
+        self.master.update()
+
+    def artificial_total(self):
+        if not self.artificials:
+            return 0.0
+        return float(np.sum(self.master.getAttr('X', self.artificials)))
+
+    def raise_penalty(self, factor=10):
+        self.artificial_penalty *= factor
+        self.master.setAttr('Obj', self.artificials, [self.artificial_penalty] * len(self.artificials))
+
+    def allowed_mask(self, patterns, owners):
+        # Columns compatible with the branching rules of the current node
+        patterns = np.asarray(patterns).reshape(-1, len(self.slots))
+        owners = np.broadcast_to(np.asarray(owners), patterns.shape[:1])
+        mask = np.ones(len(patterns), dtype=bool)
+        for t, s, v, forced in self.branch_rules:
+            ok = (patterns[:, s] == v) if forced else (patterns[:, s] != v)
+            mask &= (owners != t) | ok
+        return mask
+
+    def pool_filter(self, team):
+        if not self.branch_rules:
+            return None
+        return lambda matrix: self.allowed_mask(matrix, team)
+
+    def set_branching(self, rules):
+        # Pricers only build compatible patterns, incompatible master columns get ub = 0
+        self.branch_rules = list(rules)
+        for pricer in self.all_pricers():
+            pricer.rules = {t: [(s, v, f) for team, s, v, f in self.branch_rules if team == t]
+                            for t in self.teams}
+
+        ids = self.store.active_rows()
+        allowed = self.allowed_mask(self.store.rows()[ids], self.store.owners()[ids])
+        self.master.setAttr('UB', [self.x[i] for i in ids], np.where(allowed, GRB.INFINITY, 0).tolist())
+        self.master.update()
+
+    def start_node(self, rules, cutoff=np.inf):
+        # Bounds and stabilization centers belong to the node, columns are kept
+        self.set_branching(rules)
+        self.cutoff = cutoff
+        self.lower_bound = -np.inf
+        self.lp_bound = np.inf
+        self.stabilizer.reset()
+        if self.scheduler is not None:
+            self.scheduler.reset()
+
+    def stop(self):
+        self.stopped = True
+        self.master.terminate()
+
+    def time_limit(self):
+        # Seconds left for a solver call in the current phase, None without a deadline
+        if self.deadline is None:
+            return None
+        return self.deadline.limit()
+
     def master_solve(self):
         self.master.update()
+        if self.deadline is not None:
+            self.master.setParam('TimeLimit', self.time_limit())
         self.master.optimize()
+        self.stabilizer.stats['master_rounds'] += 1
 
-    def heur_sattelite_solve(self, home, pool_size=10):
-        gen_patts = []
-        for _ in range(pool_size):
-            ans = self.sattelite1.single_gen_solve(home)
-            if ans['status'] == 'Feasible':
-                gen_patts.append(ans['pattern'])
-        
-        return gen_patts
-    
     def get_master_duals(self):
-        dual_vars = dict()
-        dual_vars['Asignacion'] = [self.master.getConstrByName(f"Asignacion_{t}").Pi
-                                   for t in self.teams]
-        
-        dual_vars['R'] = []
+        # [Asignacion_0..Asignacion_N-1, R_0_0, ..., R_N-1_S-1]
+        return np.array(self.master.getAttr('Pi', self.constrs))
 
-        for t in self.teams:
-            for s in self.slots:
-                dual_vars['R'].append(self.master.getConstrByName(f"R_{t}_{s}").Pi)
+    def get_master_primals(self):
+        # Indexed by column id, purged columns read as 0
+        values = np.zeros(len(self.store))
+        ids = self.store.active_rows()
+        values[ids] = self.master.getAttr('X', [self.x[i] for i in ids])
+        return values
 
-        return dual_vars
-    
-    def pattern_to_column(self, pattern, team):
-        constrs1 = [0 for _ in self.teams]
-        constrs1[team] = 1
+    def manage_columns(self):
+        if self.aging is None:
+            return
+
+        ids = self.store.active_rows()
+        active_vars = [self.x[i] for i in ids]
+        basic = np.array(self.master.getAttr('VBasis', active_vars)) == GRB.BASIC
+        self.aging.update(ids, basic, self.master.getAttr('RC', active_vars))
+
+        purged = self.aging.select(ids)
+        if len(purged) == 0:
+            return
 
-        constrs2 = [0 for _ in self.slots for _ in self.teams]
+        # Nonbasic columns leave without changing the optimal basis
+        self.master.remove([self.x[i] for i in purged])
+        for i in purged:
+            self.x[i] = None
+        self.store.set_state(purged, PatternStore.POOL)
+
+        self.master.update()
+        if self.VERBOSE:
+            print(f'Purged {len(purged)} columns, {len(ids) - len(purged)} left in the master')
+    
+    def sparse_column(self, pattern, team, model_constrs=None):
+        # 1 + 2 * (away games) nonzeros: Asignacion_team and R of both teams per away slot.
+        # model_constrs: constraints of a copy of the master, same order
+        constrs = [self.assign_constrs[team]]
         for s, t in enumerate(pattern):
             if t != team:
-                constrs2[t * len(self.slots) + s] = 1
-                constrs2[team * len(self.slots) + s] = 1
+                constrs.append(self.slot_constrs[t * len(self.slots) + s])
+                constrs.append(self.slot_constrs[team * len(self.slots) + s])
+        if model_constrs is not None:
+            constrs = [model_constrs[c.index] for c in constrs]
 
-        return constrs1 + constrs2
-    
-    def add_column(self, pattern, team):
-        column = self.pattern_to_column(pattern, team)
-        
-        self.x.append(
-            self.master.addVar(
-                obj=self.get_pattern_cost(team, pattern), 
-                column=Column(column, self.master.getConstrs()),
-                name=f'x_{len(self.x)}',
-                vtype=GRB.CONTINUOUS,
-                lb=0, ub=1
+        return Column([1] * len(constrs), constrs)
+
+    def add_columns(self, columns):
+        if not columns:
+            return
+
+        teams = [team for team, _ in columns]
+        costs = pattern_costs(self.D, [pattern for _, pattern in columns], teams)
+        for (team, pattern), cost in zip(columns, costs):
+            i = self.store.add(team, pattern, cost)
+            if self.x_of(i) is not None:
+                continue
+
+            # New row, or a pooled / dropped pattern coming back under its old id
+            self.store.set_state(i, PatternStore.MASTER)
+            self.x[i] = (
+                self.master.addVar(
+                    obj=cost, 
+                    column=self.sparse_column(pattern, team),
+                    name=f'x_{i}',
+                    vtype=GRB.CONTINUOUS,
+                    lb=0, ub=GRB.INFINITY
+                )
             )
-        )
 
         self.master.update()
 
+    def x_of(self, i):
+        if i >= len(self.x):
+            self.x.extend([None] * (len(self.store) - len(self.x)))
+        return self.x[i]
+
+    def add_column(self, pattern, team):
+        self.add_columns([(team, pattern)])
+
+    def pool_column(self, pattern, team):
+        self.pool.add(team, pattern)
+
+    def resume(self, saved):
+        # Warm start: saved master columns back into the master, every other saved column to the pool
+        store, lower_bound, incumbent = saved
+        rows = store.active_rows()
+        self.add_columns(list(zip(store.owners()[rows].tolist(), store.patterns(rows))))
+        for i in np.setdiff1d(np.arange(len(store)), rows):
+            self.pool_column(store.pattern(i), int(store.owner[i]))
+
+        self.lower_bound = max(self.lower_bound, lower_bound)
+        if incumbent['patterns'] and incumbent['objective'] < self.best_sol['objective']:
+            self.best_sol = incumbent
+
+    def cache_columns(self):
+        if self.column_cache is not None:
+            self.column_cache.put(self.N, self.lower, self.upper, self.D, self.store)
+
+    def save_checkpoint(self, force=False):
+        if self.checkpoint is None or not (force or self.checkpoint.due()):
+            return
+        # Node bounds are not bounds of the instance
+        lower_bound = None if self.branch_rules else self.lower_bound
+        self.checkpoint.save(self.store, lower_bound, self.best_sol)
+
+    def pool_solve(self, team, duals):
+        if not self.use_pool:
+            return []
+
+        pooled = self.pool.price(team, duals, limit=self.pool_columns, allowed=self.pool_filter(team))
+        if pooled:
+            self.pricing_calls['pool'] += 1
+        return pooled
+
     def get_reduced_cost(self, pattern, team, dual_vars):
-        cost = self.get_pattern_cost(team, pattern)
-        column = self.pattern_to_column(pattern, team)
-        sum_duals = dual_vars['Asignacion'] + dual_vars['R']
-        constrs = sum(column[i] * sum_duals[i] for i in range(len(column)))
-    
-        return cost - constrs
+        cost = pattern_costs(self.D, pattern, team)
+        return float(reduced_costs(dual_vars, pattern, team, cost)[0])
+
+    def get_reduced_costs(self, dual_vars, columns=None):
+        # Reduced costs of the master columns (all active ones by default) in one call
+        if columns is None:
+            columns = self.store.active_rows()
+        return reduced_costs(dual_vars, self.store.rows()[columns], 
+                             self.store.owners()[columns], self.store.costs()[columns])
+
+    def exact_solve(self, t, duals):
+        if self.stopped:
+            # Rest of an interrupted round, nothing is proven
+            return {'status': 'Time Limit'}
+
+        self.pricers1[t].time_limit = self.time_limit()
+        if self.pricers2[t]:
+            self.pricers2[t].time_limit = self.time_limit()
+
+        # Comparing when having two sattelites
+        if self.pricers2[t]:
+            dictionary1 = self.pricers1[t].single_solve(t, duals)
+            dictionary2 = self.pricers2[t].single_solve(t, duals)
+            if self.VERBOSE:
+                if dictionary1['status'] != dictionary2['status']:
+                    print("\n-----------------------------------------------\n")
+                    print("No coinciden los status de los modelos")
+                    print(f"Estado satt1: {dictionary1['status']}")
+                    print(f"Estado satt2: {dictionary2['status']}")
+                    print("\n-----------------------------------------------\n")
+                    
+                
+                elif dictionary1['status'] == "Feasible" and dictionary1['obj_val'] * dictionary2['obj_val'] < 0:
+                    print("\n-----------------------------------------------")
+                    print("No coinciden los signos de los satelites")
+                    print(f"Obj_val satt1: {dictionary1['obj_val']}")
+                    print(f"Costo reducido satt1: {self.get_reduced_cost(dictionary1['pattern'], t, duals)}")
+                    print(f"Obj_val satt2: {dictionary2['obj_val']}")
+                    print(f"Costo reducido satt2: {self.get_reduced_cost(dictionary2['pattern'], t, duals)}")
+                    print(F"Patron satt1: {dictionary1['pattern']}")
+                    print(f"Patron satt2: {dictionary2['pattern']}")
+                    print("-----------------------------------------------\n")
+                
+                elif dictionary1['status'] == "Feasible" and abs(dictionary1['obj_val'] - dictionary2['obj_val']) < 1e-4:
+                    print("\n-----------------------------------------------")
+                    print("Las respuestas si coinciden")
+                    print(f"Obj_val satt1: {dictionary1['obj_val']}")
+                    print(f"Obj_val satt2: {dictionary2['obj_val']}")
+                    print(F"Patron satt1: {dictionary1['pattern']}")
+                    print(f"Patron satt2: {dictionary2['pattern']}")
+                    print("-----------------------------------------------\n")
+
+            # The second sattelite decides, the other answer goes to the pool
+            if dictionary1['status'] == "Feasible" and dictionary1['pattern'] != dictionary2.get('pattern'):
+                dictionary2['discarded'] = [dictionary1['pattern']]
+            return dictionary2
+                
+        # Having only one sattelite
+        return self.pricers1[t].single_solve(t, duals)
+
+    def price_teams(self, teams, duals, skip=None):
+        # skip(t): the pool has nothing for t and no exact call is needed, t gets no answer
+        answers = dict()
+        exact = []
+        for t in teams:
+            start = time()
+            pooled = self.pool_solve(t, duals)
+            if pooled:
+                answers[t] = {'status': 'Pool', 'patterns': pooled}
+                self.trace.record_team(t, time() - start, answers[t])
+            elif skip is None or not skip(t):
+                exact.append(t)
+
+        self.pricing_calls['exact'] += len(exact)
+        if self.pricing_workers > 1 and len(exact) > 1:
+            # The N subproblems are independent given the duals; map keeps team order
+            if self.pricing_backend == 'process' and self.pricers2[exact[0]] is None:
+                solved = self.process_round(exact, duals)
+            else:
+                with ThreadPoolExecutor(max_workers=self.pricing_workers) as executor:
+                    solved = list(executor.map(lambda t: self.timed_solve(t, duals), exact))
+        else:
+            solved = [self.timed_solve(t, duals) for t in exact]
+
+        for t, (dictionary, seconds) in zip(exact, solved):
+            answers[t] = dictionary
+            self.trace.record_team(t, seconds, dictionary)
+        return [(t, answers[t]) for t in teams if t in answers]
+
+    def process_round(self, teams, duals):
+        # Same answers as exact_solve, computed in the worker processes; the excluded
+        # patterns the sattelites update come back to the master's copies
+        if self.stopped:
+            return [({'status': 'Time Limit'}, 0.0) for _ in teams]
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.pricing_workers,
+                                                mp_context=multiprocessing.get_context('spawn'))
+
+        instance = (self.N, self.lower, self.upper, tuple(map(tuple, self.distances)))
+        futures = []
+        for t in teams:
+            pricer = self.pricers1[t]
+            pricer.time_limit = self.time_limit()
+            futures.append(self.executor.submit(process_solve, type(pricer), instance,
+                                                pricer_state(pricer, t), t, duals))
+
+        solved = []
+        for t, future in zip(teams, futures):
+            dictionary, seconds, excluded = future.result()
+            if excluded is not None:
+                self.pricers1[t].excluded[t] = excluded
+            solved.append((dictionary, seconds))
+        return solved
+
+    def close_pricing(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def timed_solve(self, t, duals):
+        start = time()
+        dictionary = self.exact_solve(t, duals)
+        return dictionary, time() - start
+
+    def pricing_round(self, duals, teams=None, partial=True):
+        if teams is None:
+            teams = self.teams
+
+        if self.scheduler is None or not partial:
+            answers = self.price_teams(teams, duals)
+            if self.scheduler is not None:
+                for t, dictionary in answers:
+                    self.record_pricing(t, duals, dictionary)
+            return answers
+
+        # Scheduled round: most promising teams first, teams whose margin still covers the
+        # dual change skipped; partial rounds stop after max_columns improving columns
+        scheduler = self.scheduler
+        stop = scheduler.max_columns if scheduler.partial else np.inf
+        answers = []
+        improving = 0
+        pending = scheduler.order(teams)
+        chunk = max(1, self.pricing_workers)
+        while pending and improving < stop:
+            batch, pending = pending[:chunk], pending[chunk:]
+            priced = self.price_teams(batch, duals, skip=lambda t: scheduler.can_skip(t, duals))
+            scheduler.unchanged += len(batch) - len(priced)
+            for t, dictionary in priced:
+                self.record_pricing(t, duals, dictionary)
+                if self.is_improving(dictionary):
+                    improving += 1
+                answers.append((t, dictionary))
+
+        scheduler.skipped += len(teams) - len(answers)
+        if scheduler.partial:
+            scheduler.partial_rounds += 1
+            if improving < scheduler.max_columns:
+                # Fewer than max_columns improving teams: full rounds from now on
+                scheduler.partial = False
+        else:
+            scheduler.full_round(improving)
+
+        return sorted(answers, key=lambda answer: answer[0])
+
+    def is_improving(self, dictionary):
+        return (dictionary['status'] == "Pool" 
+                or (dictionary['status'] == "Feasible" and dictionary['obj_val'] < -self.rc_tolerance))
+
+    def record_pricing(self, t, duals, dictionary):
+        if dictionary['status'] == "Feasible":
+            self.scheduler.record(t, duals, dictionary['obj_val'])
+        else:
+            self.scheduler.record(t, duals, None)
+
+    def collect_columns(self, answers):
+        optimal = True
+        new_columns = []
+        for t, dictionary in answers:
+            if dictionary['status'] == "Pool":
+                optimal = False
+                new_columns.extend((t, p) for p in dictionary['patterns'])
+                continue
+
+            if dictionary['status'] == "Feasible":
+                self.pricing_failures[t] = 0
+
+            if dictionary['status'] == "Feasible" and dictionary['obj_val'] < -self.rc_tolerance:
+                optimal = False
+                new_columns.extend((t, p) for p in dictionary.get('patterns', [dictionary['pattern']]))
+            elif dictionary['status'] == "Feasible":
+                self.pool_column(dictionary['pattern'], t)
+            elif dictionary['status'] == "Infeasible":
+                # The sattelite drops its exclusions and is asked again next round
+                optimal = False
+                self.pricing_failures[t] += 1
+            elif dictionary['status'] == "Time Limit":
+                # Nothing proven for this team
+                optimal = False
+
+            for pattern in dictionary.get('discarded', []):
+                self.pool_column(pattern, t)
+
+        return optimal, new_columns
+
+    def derive_columns(self, columns, duals):
+        # Transformed copies of the new columns scored with the master duals, no pricing call
+        if not self.derived_columns or not columns:
+            return []
+
+        teams = [t for t, _ in columns]
+        patterns, owners = derive_patterns([p for _, p in columns], teams, self.lower, self.upper,
+                                           self.derived_columns)
+        # Not already in the master
+        keep = np.array([i is None or self.x_of(i) is None for i in map(self.store.row_of, patterns)],
+                        dtype=bool)
+        if self.branch_rules and len(patterns):
+            keep &= self.allowed_mask(patterns, owners)
+        patterns, owners = patterns[keep], owners[keep]
+        if len(patterns) == 0:
+            return []
+
+        rc = reduced_costs(duals, patterns, owners, pattern_costs(self.D, patterns, owners))
+        derived = []
+        for t in np.unique(owners):
+            ids = np.flatnonzero((owners == t) & (rc < -self.rc_tolerance))
+            for k in ids[np.argsort(rc[ids], kind='stable')][:self.derived_limit]:
+                derived.append((int(t), tuple(int(v) for v in patterns[k])))
+
+        self.derived_count += len(derived)
+        return derived
+
+    def lagrangian_bound(self, duals, answers):
+        # Farley/Lasdon bound sum(pi) + sum_t min_p rc_t(p); needs an exact answer for every team.
+        # Patterns the sattelites exclude are in the master or the pool, so those are scanned too
+        if len(answers) < self.N or any(d['status'] != "Feasible" for _, d in answers):
+            return None
+
+        columns = self.store.active_rows()
+        if self.branch_rules:
+            columns = columns[self.allowed_mask(self.store.rows()[columns], self.store.owners()[columns])]
+        master_rc = self.get_reduced_costs(duals, columns)
+        owners = self.store.owners()[columns]
+        bound = float(np.sum(duals))
+        for t, dictionary in answers:
+            bound += min(dictionary['obj_val'], 
+                         master_rc[owners == t].min(initial=np.inf),
+                         self.pool.min_reduced_cost(t, duals, self.pool_filter(t)))
+
+        return bound
+
+    def stabilized_pricing(self, duals):
+        mispricings = 0
+        while True:
+            point = self.stabilizer.separation_point(duals, mispricings)
+            answers = self.pricing_round(point)
+            optimal, new_columns = self.collect_columns(answers)
+            if optimal and len(answers) < self.N:
+                # A scheduled round found nothing but skipped or stopped before some teams:
+                # exact pass over them before declaring optimality
+                priced = {t for t, _ in answers}
+                rest = [t for t in self.teams if t not in priced]
+                rest_answers = self.pricing_round(point, rest, partial=False)
+                optimal, new_columns = self.collect_columns(rest_answers)
+                answers = sorted(answers + rest_answers, key=lambda answer: answer[0])
+
+            self.stabilizer.stats['pricing_rounds'] += 1
+            bound = self.lagrangian_bound(point, answers)
+            if bound is not None:
+                self.lower_bound = max(self.lower_bound, bound)
+            self.stabilizer.update(point, bound)
+            if point is duals:
+                break
+
+            # Smoothed point: only columns pricing out at the master duals enter the master
+            improving = []
+            for t, pattern in new_columns:
+                if self.get_reduced_cost(pattern, t, duals) < -1e-6:
+                    improving.append((t, pattern))
+                else:
+                    self.pool_column(pattern, t)
+
+            if improving:
+                return False, improving
+
+            mispricings += 1
+            self.stabilizer.misprice()
+
+        if optimal and self.stabilizer.slack_total() > 1e-6:
+            # Converged for the penalized master only
+            self.stabilizer.null_step(duals)
+            optimal = False
+
+        return optimal, new_columns
+
+    def bound_gap(self, value, integer=False):
+        lower = self.lower_bound
+        if integer and self.integral_costs:
+            # Integer schedules have integer cost
+            lower = np.ceil(lower - 1e-6)
+        return (value - lower) / max(1.0, abs(value))
+
+    def gap_closed(self):
+        if self.lower_bound == -np.inf:
+            return False
+
+        if self.cutoff < np.inf and self.bound_gap(self.cutoff, integer=True) <= 0:
+            # Node bound reached the incumbent, nothing better below
+            return True
+
+        if self.gap_tolerance is None:
+            return False
+
+        return (self.bound_gap(self.lp_bound) <= self.gap_tolerance
+                or self.bound_gap(self.best_sol['objective'], integer=True) <= self.gap_tolerance)
 
     def solve_alg(self):
-        self.optimal = False
         self.iterations = 0
         self.start_time = time()
+        self.trace.start = self.start_time
         print("hola")
 
-        while not self.optimal:
+        try:
+            self.column_generation()
+        except Exception as error:
+            # Reported by solve() instead of dying silently with the thread
+            self.error = error
+            self.stopped = True
+
+    def update_incumbent(self, objective, patterns):
+        # A better schedule also tightens the node cutoff
+        if not patterns or objective >= self.best_sol['objective'] - 1e-9:
+            return False
+        self.best_sol = {'objective': float(objective), 'patterns': list(patterns)}
+        self.cutoff = min(self.cutoff, float(objective))
+        if self.VERBOSE:
+            print(f'Heuristic incumbent: {objective}')
+        return True
+
+    def run_heuristics(self, values):
+        # Heuristics see the LP solution of this iteration; diving runs column generation
+        # itself and no heuristic is started from inside it
+        if self.in_heuristic:
+            return
+
+        self.in_heuristic = True
+        try:
+            for heuristic in self.heuristics:
+                best = self.best_sol['objective']
+                found = heuristic.poll(self)
+                if found is not None:
+                    self.update_incumbent(*found)
+
+                if heuristic.due(self.iterations) and not self.stopped:
+                    heuristic.calls += 1
+                    found = heuristic.run(self, values)
+                    if found is not None:
+                        self.update_incumbent(*found)
+
+                if self.best_sol['objective'] < best:
+                    heuristic.improvements += 1
+        finally:
+            self.in_heuristic = False
+
+    def heuristic_stats(self):
+        return {type(h).__name__: h.stats() for h in self.heuristics}
+
+    def close_heuristics(self):
+        for heuristic in self.heuristics:
+            heuristic.close()
+
+    def column_generation(self, max_iterations=None):
+        # Runs until the LP of the current node is solved, its bound reaches the
+        # gap tolerance or the cutoff, or the node turns out infeasible
+        # (max_iterations: also stop after that many iterations, used when diving)
+        self.optimal = False
+        self.gap_stop = False
+        self.infeasible = False
+        self.pricing_failures[:] = 0
+        self.master_status = None
+        first = self.iterations
+
+        while not (self.optimal or self.gap_stop or self.infeasible or self.stopped):
+            if max_iterations is not None and self.iterations - first >= max_iterations:
+                break
+
+            if self.deadline is not None and self.time_limit() <= 0:
+                # Phase over: leave the node as it is, like an external stop
+                self.stopped = True
+                break
+
+            self.trace.new_row(self.iterations)
+            start = time()
             self.master_solve()
+            self.trace.set(master_time=time() - start, master_simplex_iters=self.master.IterCount)
+            status = self.master.status
 
-            if self.master.status == GRB.OPTIMAL:
+            if status == GRB.OPTIMAL:
                 self.solved = True
                 if self.VERBOSE:
                     print(f'Optimal solution found: ObjVal: {self.master.objVal}')
-                non_zero_vars = {var.VarName: var.X 
-                                 for var in self.master.getVars() if var.X != 0}
+                feasible = self.stabilizer.slack_total() < 1e-6 and self.artificial_total() < 1e-6
+                if feasible:
+                    # Value of the restricted master, an upper bound on the LP optimum
+                    self.lp_bound = self.master.objVal
+                values = self.get_master_primals()
+                non_zero = np.flatnonzero(values > 1e-9)
 
-                if all(var == 1.0 for var in non_zero_vars.values()) and self.master.objVal < self.best_sol['objective']:
+                integral = np.all(values[non_zero] > 1 - 1e-9) and feasible
+                if integral and self.master.objVal < self.best_sol['objective']:
                     self.best_sol['objective'] = self.master.objVal
-                    self.best_sol['patterns'] = [self.patterns[int(var[2:])] 
-                                                 for var in non_zero_vars.keys()]
+                    self.best_sol['patterns'] = self.store.patterns(non_zero)
                     if self.VERBOSE:
                         print('\nINTEGER SOLUTION!\n')
 
                 else:
                     self.partial_sol['objective'] = self.master.objVal
-                    self.partial_sol['patterns'] = {(var, val): self.patterns[int(var[2:])] 
-                                                    for var, val in non_zero_vars.items()}
+                    self.partial_sol['patterns'] = {(f'x_{i}', values[i]): self.store.pattern(i) 
+                                                    for i in non_zero}
 
+                # Everything read from the solution before the master changes
+                self.primals = values
+                artificials = self.artificial_total()
                 duals = self.get_master_duals()
+                self.duals = duals
+                self.trace.set(master_obj=self.master.objVal)
 
-                optimal = True
-                for t in self.teams:
-                    # Comparing when having two sattelites
-                    if self.sattelite1 and self.sattelite2:
-                        dictionary1 = self.sattelite1.single_solve(t, duals['Asignacion'] + duals['R'])
-                        dictionary2 = self.sattelite2.single_solve(t, duals['Asignacion'] + duals['R'])
-                        if self.VERBOSE:
-                            if dictionary1['status'] != dictionary2['status']:
-                                print("\n-----------------------------------------------\n")
-                                print("No coinciden los status de los modelos")
-                                print(f"Estado satt1: {dictionary1['status']}")
-                                print(f"Estado satt2: {dictionary2['status']}")
-                                print("\n-----------------------------------------------\n")
-                                
-                            
-                            elif dictionary1['status'] == "Feasible" and dictionary1['obj_val'] * dictionary2['obj_val'] < 0:
-                                print("\n-----------------------------------------------")
-                                print("No coinciden los signos de los satelites")
-                                print(f"Obj_val satt1: {dictionary1['obj_val']}")
-                                print(f"Costo reducido satt1: {self.get_reduced_cost(dictionary1['pattern'], t, duals)}")
-                                print(f"Obj_val satt2: {dictionary2['obj_val']}")
-                                print(f"Costo reducido satt2: {self.get_reduced_cost(dictionary2['pattern'], t, duals)}")
-                                print(F"Patron satt1: {dictionary1['pattern']}")
-                                print(f"Patron satt2: {dictionary2['pattern']}")
-                                print("-----------------------------------------------\n")
-                            
-                            elif dictionary1['status'] == "Feasible" and abs(dictionary1['obj_val'] - dictionary2['obj_val']) < 1e-4:
-                                print("\n-----------------------------------------------")
-                                print("Las respuestas si coinciden")
-                                print(f"Obj_val satt1: {dictionary1['obj_val']}")
-                                print(f"Obj_val satt2: {dictionary2['obj_val']}")
-                                print(F"Patron satt1: {dictionary1['pattern']}")
-                                print(f"Patron satt2: {dictionary2['pattern']}")
-                                print("-----------------------------------------------\n")
-                        
-                        if dictionary2['status'] == "Feasible" and dictionary2['obj_val'] < 0:
-                            optimal = False
-                            self.patterns.append(dictionary2['pattern'])
-                            self.add_column(dictionary2['pattern'], t)
-                        elif dictionary2['status'] == "Infeasible":
-                            optimal = False
-                            
-                    # Having only one sattelite
-                    elif self.sattelite1:
-                        dictionary = self.sattelite1.single_solve(t, duals['Asignacion'] + duals['R'])
-
-                        if dictionary['status'] == "Feasible" and dictionary['obj_val'] < 0:
-                            optimal = False
-                            self.patterns.append(dictionary['pattern'])
-                            self.add_column(dictionary['pattern'], t)
-                        elif dictionary['status'] == "Infeasible":
-                            optimal = False
-
+                start = time()
+                optimal, new_columns = self.stabilized_pricing(duals)
+                pricing_time = time() - start
+                if not optimal:
+                    new_columns += self.derive_columns(new_columns, duals)
+                    self.manage_columns()
+                self.add_columns(new_columns)
+                self.save_checkpoint()
+                self.trace.set(pricing_time=pricing_time,
+                               columns_added=len(new_columns), master_size=len(self.store.active_rows()),
+                               pool_size=len(self.pool), lp_bound=self.lp_bound,
+                               lower_bound=self.lower_bound, incumbent=self.best_sol['objective'])
                 self.optimal = optimal
+                if optimal and artificials > 1e-6:
+                    # Artificials still in use at the LP optimum: penalty too low or no
+                    # feasible schedule under the current rules
+                    self.optimal = False
+                    if self.artificial_penalty < self.max_penalty:
+                        self.raise_penalty()
+                    else:
+                        self.infeasible = True
+
+                if self.pricing_failures.max() >= 2:
+                    # Infeasible sattelite even without exclusions
+                    self.infeasible = True
+
+                if not (self.optimal or self.infeasible):
+                    self.run_heuristics(values)
 
-            if self.master.status == GRB.INFEASIBLE:
+                if not optimal and self.gap_closed():
+                    self.gap_stop = True
+                    if self.VERBOSE:
+                        print(f'Gap closed: LP {self.lp_bound}, lower bound {self.lower_bound}')
+
+            elif status == GRB.INFEASIBLE:
+                # Cannot happen with the artificials in place
                 if self.VERBOSE:
                     print("Infeasible master problem")
-                for t in self.teams:
-                    gen_patts = self.heur_sattelite_solve(t)
-                    for p in gen_patts:
-                        self.patterns.append(p)
-                        self.add_column(p, t)
+                self.infeasible = True
+
+            elif status in (GRB.UNBOUNDED, GRB.INF_OR_UNBD) and self.stabilizer.penalized and self.stabilizer.epsilon > 0:
+                # The stabilization slacks gave the master a ray: plain master from here on
+                if self.VERBOSE:
+                    print("Unbounded stabilized master, stabilization released")
+                self.stabilizer.release()
+
+            else:
+                # Time limit, interruption or any other status: never re-solve the same master
+                if status not in (GRB.TIME_LIMIT, GRB.INTERRUPTED):
+                    self.master_status = status
+                    if self.VERBOSE:
+                        print(f"Master problem ended with status {status}")
+                self.stopped = True
 
             self.iterations += 1
 
     def solve(self, timeout=3600):
+        # timeout covers the whole run: column generation, then the integer phase
+        # with whatever is left (see Deadline.PHASES for the split)
+        if self.deadline is None:
+            self.deadline = Deadline(timeout, self.phase_fractions)
+        self.deadline.check('colgen', 'integer')
+
         print("partire la thread")
         solve_thread = Thread(target=self.solve_alg, daemon=True)
+        # The phase starts before the first pricing call reads it
+        colgen_time = self.deadline.start_phase('colgen')
         solve_thread.start()
 
-        solve_thread.join(timeout=timeout)
+        solve_thread.join(timeout=colgen_time)
         tiempo_terminado = False
-        if solve_thread.is_alive():
+        if self.error is not None:
+            print(f'\nERROR: {self.error!r}')
+        elif solve_thread.is_alive() or (self.stopped and not self.optimal):
             print('\nTIMEOUT')
             tiempo_terminado = True
-            self.master.terminate()
+            self.stop()
+
+        # An interrupted pricing call ends within its own limit, the integer phase then
+        # works on the master alone
+        solve_thread.join(timeout=self.deadline.remaining())
+        self.close_pricing()
+        self.close_heuristics()
+        if self.error is None:
+            integer_patterns, integer_solution = self.integer_solver(timeout=self.deadline.start_phase('integer'))
+        else:
+            # The master may be half updated, only the incumbent is kept
+            integer_patterns = self.best_sol['patterns'] or None
+            integer_solution = self.best_sol['objective'] if integer_patterns else None
 
-        integer_patterns, integer_solution = self.integer_solver(timeout=timeout)
+        if integer_patterns and integer_solution < self.best_sol['objective']:
+            self.best_sol = {'objective': integer_solution, 'patterns': integer_patterns}
+        self.save_checkpoint(force=True)
+        self.cache_columns()
+        self.write_trace()
         
-        stop = time()
-        self.elapsed_time = stop - self.start_time
+        self.elapsed_time = self.deadline.elapsed()
 
         self.print_results()
 
         if self.VERBOSE:
             print(f'\nElapsed time: {self.elapsed_time}')
+            print(f'Convergence ({self.stabilizer.mode}): {self.stabilizer.stats}')
         
         ans = dict()
         ans['pattern'] = integer_patterns
         ans['best fractionary solution'] = self.partial_sol['objective']
         ans['best integer solution'] = integer_solution
-        if tiempo_terminado:
+        if self.error is not None:
+            ans['status'] = f'Error {type(self.error).__name__}: {self.error}'
+        elif self.master_status is not None:
+            ans['status'] = f'Master Status {self.master_status}'
+        elif tiempo_terminado:
             ans['status'] = 'Time Limit'
+        elif self.gap_stop:
+            ans['status'] = 'Gap Limit'
+        elif self.infeasible:
+            ans['status'] = 'Infeasible'
         else:
             ans['status'] = 'Optimal'
         ans['time'] = self.elapsed_time
+        ans['lp bound'] = float(self.lp_bound)
+        ans['lower bound'] = float(self.lower_bound)
+        ans['stabilization'] = dict(self.stabilizer.stats, iterations=self.iterations)
+        ans['pricing'] = dict(self.pricing_calls)
+        if self.scheduler is not None:
+            ans['pricing'].update(partial_rounds=self.scheduler.partial_rounds, skipped=self.scheduler.skipped,
+                                  unchanged=self.scheduler.unchanged)
+        if self.derived_columns:
+            ans['derived columns'] = self.derived_count
+        if self.heuristics:
+            ans['heuristics'] = self.heuristic_stats()
         
         return ans
         
+    def write_trace(self, path=None):
+        path = path or self.trace_path
+        if path is None:
+            return
+        if path.endswith('.json'):
+            self.trace.to_json(path)
+        else:
+            self.trace.to_csv(path)
+
+    def binary_clone(self, env=None, extra=()):
+        # Copy of the restricted master (in env if given) with the columns as binaries and the
+        # artificials / stabilization slacks fixed at 0, plus the store rows extra as binary
+        # columns of the copy only; returns the model, its column variables and their rows
+        self.master.update()
+        model = self.master.copy(env=env) if env is not None else self.master.copy()
+        model.Params.OutputFlag = 0
+
+        # Same variable order as the master
+        variables = model.getVars()
+        active = self.store.active_rows()
+        x_int = [variables[self.x[i].index] for i in active]
+        fixed = [variables[v.index] for v in self.artificials + self.stabilizer.plus + self.stabilizer.minus]
+
+        # Columns the branching rules exclude keep ub = 0
+        upper = np.minimum(self.master.getAttr('UB', [self.x[i] for i in active]), 1)
+        model.setAttr('VType', x_int, [GRB.BINARY] * len(x_int))
+        model.setAttr('UB', x_int, upper.tolist())
+        if fixed:
+            model.setAttr('UB', fixed, [0.0] * len(fixed))
+
+        extra = np.asarray(extra, dtype=np.intp)
+        if len(extra):
+            constrs = model.getConstrs()
+            x_int += [model.addVar(obj=float(self.store.cost[i]), vtype=GRB.BINARY, ub=1, name=f'x_{i}',
+                                   column=self.sparse_column(self.store.pattern(i), int(self.store.owner[i]), constrs))
+                      for i in extra.tolist()]
+            active = np.concatenate([active, extra])
+            model.update()
+
+        # MIP start from the incumbent (a constructive timetable or an integral master solution)
+        if self.best_sol['patterns']:
+            incumbent = {self.store.row_of(p) for p in self.best_sol['patterns']}
+            model.setAttr('Start', x_int, [float(i in incumbent) for i in active])
+
+        return model, x_int, active
+
     def integer_solver(self, timeout=3600):
-        self.model_int = Model()
-        self.model_int.Params.OutputFlag = 0  # Suppress output
-        self.model_int.Params.NonConvex = 2  # Suppress academic license message
-        self.model_int.setParam('TimeLimit', timeout)
+        # Binary clone of the master with the pool columns (and the incumbent's) added to the
+        # clone only, the master itself is left as it is (branch-and-price keeps using it)
+        incumbent = [self.store.add(self.store.team_of(p), p, state=PatternStore.POOL) for p in self.best_sol['patterns']]
+        candidates = self.store.rows_in(PatternStore.POOL)
+        if self.branch_rules:
+            candidates = candidates[self.allowed_mask(self.store.rows()[candidates], self.store.owners()[candidates])]
+        if self.integer_pool is not None and len(candidates) > self.integer_pool:
+            if self.duals is None:
+                rc = self.store.cost[candidates]
+            else:
+                rc = reduced_costs(self.duals, self.store.rows()[candidates], self.store.owners()[candidates],
+                                   self.store.cost[candidates])
+            candidates = candidates[np.argsort(rc, kind='stable')[:self.integer_pool]]
+        candidates = np.union1d(candidates, [i for i in incumbent if self.store.state[i] != PatternStore.MASTER]).astype(np.intp)
 
-        self.x_int = [self.model_int.addVar(vtype=GRB.BINARY, name=f'x_{i}') 
-                  for i in range(len(self.patterns))]
-        
-        self.create_aux_sets()
-        self.set_costs()
-        
-        for t in self.teams: 
-            for s in self.slots:
-                self.model_int.addConstr(
-                    (quicksum(self.x_int[i] for i in self.home_t_s[t, s]) 
-                     + quicksum(self.x_int[i] for i in self.away_t_s[t, s]) == 1),
-                    name=f"R_{t}_{s}"
-                )
+        self.model_int, x_int, active = self.binary_clone(extra=candidates)
+        self.model_int.setParam('TimeLimit', timeout)
+        if self.mip_gap is not None:
+            self.model_int.setParam('MIPGap', self.mip_gap)
+        if self.pool_solutions is not None:
+            self.model_int.setParam('PoolSolutions', self.pool_solutions)
 
-        for t in self.teams:
-            self.model_int.addConstr(
-                quicksum(self.x_int[i] for i in self.team_patterns[t]) == 1,
-                f"Asignacion_{t}"
-            )
-        
-        self.model_int.update()
-        
-        self.model_int.setObjective(
-            quicksum(self.x_int[i] * self.costs[i] for i in range(len(self.patterns)))
-            , GRB.MINIMIZE
-        )
-        
-        self.model_int.update()
         self.model_int.optimize()
         
         if self.model_int.status == GRB.OPTIMAL or (self.model_int.status == GRB.TIME_LIMIT and self.model_int.solCount > 0) or self.model_int.status == GRB.SUBOPTIMAL:
             if self.VERBOSE:
                 print("SOLUCION ENTERA CON LAS COLUMNAS GENERADAS")
                 print(self.model_int.ObjVal)
-            patrones = []
-            for i in range(len(self.patterns)):
-                if self.x_int[i].X >= 0.5:
-                    if self.VERBOSE:
-                        print(self.patterns[i])
-                    patrones.append(self.patterns[i])
+            values = np.array(self.model_int.getAttr('X', x_int))
+            patrones = self.store.patterns(active[values >= 0.5])
+            if self.VERBOSE:
+                for pattern in patrones:
+                    print(pattern)
             return patrones, self.model_int.ObjVal
         
         else: